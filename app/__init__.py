@@ -3,8 +3,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from app.config import Config
+from app.replica import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 
@@ -12,10 +13,31 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    db.init_app(app)
+    from app import database, replica
+    database.init_app(app)
+    replica.init_app(app)
+    from app import instrumentation
+    instrumentation.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
     
+    from app import events, counters, identity
+    from app.cli import stats_cli, images_cli, patients_cli, jobs_cli, templates_cli
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(patients_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(templates_cli)
+
+    from app.jobs import worker
+    worker.init_app(app)
+
+    from app import images
+    images.init_app(app)
+
+    from app import assets
+    assets.init_app(app)
+
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
 
@@ -25,6 +47,7 @@ def create_app(config_class=Config):
     from app.doctor import doctor
     from app.appointment import appointment
     from app.billing import billing
+    from app.jobs import jobs
     
     app.register_blueprint(main)
     app.register_blueprint(auth)
@@ -32,5 +55,9 @@ def create_app(config_class=Config):
     app.register_blueprint(doctor)
     app.register_blueprint(appointment)
     app.register_blueprint(billing)
+    app.register_blueprint(jobs)
+
+    from app import templating
+    templating.init_app(app)
 
     return app
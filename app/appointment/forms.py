@@ -1,11 +1,21 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, SelectField, DateTimeLocalField, TextAreaField
-from wtforms.validators import DataRequired
+from wtforms.validators import DataRequired, ValidationError
 from app.models import Doctor
+from app.appointment import slots
+from app.choices import PatientSelectField
 
 class AppointmentForm(FlaskForm):
     doctor = SelectField('Doctor', coerce=int, validators=[DataRequired()])
-    patient = SelectField('Patient', coerce=int, validators=[DataRequired()])
+    patient = PatientSelectField('Patient', validators=[DataRequired()])
     date_time = DateTimeLocalField('Date & Time', format='%Y-%m-%dT%H:%M', validators=[DataRequired()])
     reason = TextAreaField('Reason for Visit', validators=[DataRequired()])
     submit = SubmitField('Book Appointment')
+
+    # Set when editing: an older off-grid appointment may keep its time
+    original_date_time = None
+
+    def validate_date_time(self, date_time):
+        if date_time.data and date_time.data != self.original_date_time and not slots.on_grid(date_time.data):
+            minutes = slots.slot_length().seconds // 60
+            raise ValidationError(f'Appointments start every {minutes} minutes (e.g. 9:00, 9:{minutes:02d}).')
@@ -1,52 +1,66 @@
-from flask import render_template, url_for, flash, redirect, request, abort
+import datetime
+from flask import render_template, url_for, flash, redirect, request, abort, jsonify
 from app import db
 from app.appointment import appointment
 from app.appointment.forms import AppointmentForm
-from app.models import Appointment, Doctor, Patient
+from app.appointment import slots
+from app import choices, identity
+from app.models import Appointment, Doctor, User
+from app.pagination import KeysetPage, keyset_paginate, filter_date_range, parse_date
 from flask_login import login_required, current_user
+from app.replica import read_only
 
 @appointment.route("/appointments")
 @login_required
+@read_only
 def list_appointments():
+    query = Appointment.list_query()
+    doctors = []
     if current_user.role == 'doctor':
-        doctor = Doctor.query.filter_by(user_id=current_user.id).first()
-        if doctor:
-            appointments = Appointment.query.filter_by(doctor_id=doctor.id).all()
-        else:
-            appointments = []
+        doctor = identity.current().doctor
+        query = query.filter_by(doctor_id=doctor.id) if doctor else None
     elif current_user.role == 'admin' or current_user.role == 'receptionist':
-         appointments = Appointment.query.all()
+        # Staff can narrow the list down to a single doctor
+        doctors = db.session.query(Doctor.id, User.username).join(Doctor.user).order_by(User.username).all()
+        doctor_id = request.args.get('doctor', type=int)
+        if doctor_id:
+            query = query.filter(Appointment.doctor_id == doctor_id)
     else:
         # Patient view
-        patient = Patient.query.filter_by(user_id=current_user.id).first()
-        if patient:
-            appointments = Appointment.query.filter_by(patient_id=patient.id).all()
-        else:
-            appointments = []
+        patient = identity.current().patient
+        query = query.filter_by(patient_id=patient.id) if patient else None
+
+    if query is None:
+        page = KeysetPage([], None, None)
+    else:
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Appointment.status == status)
+        query = filter_date_range(query, Appointment.date_time, parse_date('date_from'), parse_date('date_to'))
+        page = keyset_paginate(query, [Appointment.date_time, Appointment.id])
 
-    return render_template('appointment/list.html', appointments=appointments)
+    return render_template('appointment/list.html', appointments=page.items, page=page, doctors=doctors)
 
 @appointment.route("/appointment/book", methods=['GET', 'POST'])
 @login_required
 def book_appointment():
     form = AppointmentForm()
     # Populate doctors
-    form.doctor.choices = [(d.id, f"{d.user.username} ({d.specialization})") for d in Doctor.query.all()]
+    form.doctor.choices = choices.doctor_choices()
     
     # Context-aware patient selection
     if current_user.role == 'patient':
-        current_appt_patient = Patient.query.filter_by(user_id=current_user.id).first()
+        current_appt_patient = identity.current().patient
         if current_appt_patient:
+            form.patient.allowed = {current_appt_patient.id}
             form.patient.choices = [(current_appt_patient.id, current_appt_patient.name)]
             if request.method == 'GET':
                  form.patient.data = current_appt_patient.id
         else:
              # Should practically not happen if registration flow is correct, but safe fallback
-             form.patient.choices = []
+             form.patient.allowed = set()
              flash('No patient profile found. Please contact support.', 'danger')
-    else:
-        # Admin / Receptionist / Doctor can book for anyone
-        form.patient.choices = [(p.id, p.name) for p in Patient.query.all()]
+    # Admin / Receptionist / Doctor can book for anyone, found through the search box
     
     if form.validate_on_submit():
         appointment = Appointment(
@@ -56,10 +70,14 @@ def book_appointment():
             reason=form.reason.data, 
             status='Scheduled'
         )
-        db.session.add(appointment)
-        db.session.commit()
-        flash('Appointment Booked!', 'success')
-        return redirect(url_for('appointment.list_appointments'))
+        try:
+            slots.take_slot(appointment)
+            db.session.commit()
+            flash('Appointment Booked!', 'success')
+            return redirect(url_for('appointment.list_appointments'))
+        except slots.SlotTaken as e:
+            db.session.rollback()
+            form.date_time.errors.append(str(e))
         
     return render_template('appointment/book.html', title='Book Appointment', form=form, legend='Book Appointment')
 
@@ -71,30 +89,35 @@ def update_appointment(appointment_id):
         abort(403)
         
     form = AppointmentForm()
+    form.original_date_time = appointment.date_time
     # Populate doctors choices
-    form.doctor.choices = [(d.id, f"{d.user.username} ({d.specialization})") for d in Doctor.query.all()]
+    form.doctor.choices = choices.doctor_choices()
     # Populate patient choices - Context aware
     if current_user.role == 'patient':
-        current_appt_patient = Patient.query.filter_by(user_id=current_user.id).first()
+        current_appt_patient = identity.current().patient
         if current_appt_patient:
+             form.patient.allowed = {current_appt_patient.id}
              form.patient.choices = [(current_appt_patient.id, current_appt_patient.name)]
         else:
-             form.patient.choices = []
-    else:
-        # Admin / Receptionist / Doctor can choose any patient
-        form.patient.choices = [(p.id, p.name) for p in Patient.query.all()]
+             form.patient.allowed = set()
+    # Admin / Receptionist / Doctor can choose any patient, found through the search box
 
     if form.validate_on_submit():
         appointment.doctor_id = form.doctor.data
         appointment.patient_id = form.patient.data
         appointment.date_time = form.date_time.data
         appointment.reason = form.reason.data
-        db.session.commit()
-        flash('Appointment updated!', 'success')
-        return redirect(url_for('appointment.list_appointments'))
+        try:
+            slots.take_slot(appointment)
+            db.session.commit()
+            flash('Appointment updated!', 'success')
+            return redirect(url_for('appointment.list_appointments'))
+        except slots.SlotTaken as e:
+            db.session.rollback()
+            form.date_time.errors.append(str(e))
     elif request.method == 'GET':
         form.doctor.data = appointment.doctor_id
-        form.patient.data = appointment.patient_id
+        form.patient.select(appointment.patient)
         form.date_time.data = appointment.date_time
         form.reason.data = appointment.reason
 
@@ -112,3 +135,21 @@ def delete_appointment(appointment_id):
     db.session.commit()
     flash('Appointment deleted!', 'success')
     return redirect(url_for('appointment.list_appointments'))
+
+@appointment.route("/api/slots")
+@login_required
+@read_only
+def api_slots():
+    # Next free slots across doctors, e.g. /api/slots?specialization=Cardiology&count=5
+    start = request.args.get('from')
+    try:
+        start = datetime.datetime.fromisoformat(start) if start else datetime.datetime.now()
+    except ValueError:
+        abort(400)
+    if start.tzinfo:
+        # Appointment times are naive server-local times
+        start = start.astimezone().replace(tzinfo=None)
+    count = max(1, min(request.args.get('count', 10, type=int), 100))
+    days = max(1, min(request.args.get('days', 14, type=int), 90))
+    found = slots.free_slots(start, count, request.args.get('specialization') or None, days)
+    return jsonify(slots=found)
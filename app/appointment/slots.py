@@ -0,0 +1,155 @@
+import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db, availability
+from app.models import Appointment, Doctor, User
+
+# Every appointment occupies one fixed-length slot starting at its date_time, and new
+# bookings must start on the slot grid (e.g. 9:00, 9:30). On the grid two bookings
+# overlap exactly when they start at the same time, so the partial unique index
+# uq_appointment_doctor_slot (doctor_id, date_time WHERE status = 'Scheduled') is an
+# exclusion constraint: of two receptionists submitting the same slot at once, the
+# database lets exactly one commit. Older off-grid appointments are caught by
+# find_clash, a range seek on ix_appointment_doctor_id_date_time (O(log n)).
+
+SLOT_INDEX = 'uq_appointment_doctor_slot'
+
+class SlotTaken(Exception):
+    pass
+
+def slot_length():
+    return datetime.timedelta(minutes=current_app.config['APPOINTMENT_SLOT_MINUTES'])
+
+def on_grid(value):
+    minutes = value.hour * 60 + value.minute
+    return value.second == 0 and value.microsecond == 0 and minutes % current_app.config['APPOINTMENT_SLOT_MINUTES'] == 0
+
+def find_clash(doctor_id, start, exclude_id=None):
+    # The scheduled appointment of this doctor overlapping [start, start + slot), if any
+    length = slot_length()
+    query = Appointment.query.filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.date_time > start - length,
+        Appointment.date_time < start + length,
+        Appointment.status == 'Scheduled'
+    )
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    return query.first()
+
+def take_slot(appointment):
+    # Flushes a new or changed appointment, raising SlotTaken if its doctor is busy then.
+    # The caller commits, or rolls back on SlotTaken.
+    if appointment.status == 'Scheduled':
+        with db.session.no_autoflush:
+            clash = find_clash(appointment.doctor_id, appointment.date_time, appointment.id)
+        if clash:
+            raise SlotTaken(f"The doctor already has an appointment at {clash.date_time.strftime('%b %d, %Y %I:%M %p')}.")
+    db.session.add(appointment)
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        # Someone else booked the same slot since the check above
+        if not _slot_index_failed(e.orig):
+            raise
+        raise SlotTaken('That slot has just been booked. Please pick another time.')
+
+def _slot_index_failed(error):
+    # PostgreSQL names the violated index (psycopg2 also in .diag); SQLite only lists its columns
+    diag = getattr(error, 'diag', None)
+    message = str(error)
+    return (getattr(diag, 'constraint_name', None) == SLOT_INDEX or SLOT_INDEX in message
+            or 'appointment.doctor_id, appointment.date_time' in message)
+
+
+# Free-slot search: every doctor's weekly windows are laid over the requested days and
+# cut into grid slots as flat numpy arrays (no per-slot Python loop); booked slots are
+# removed with one searchsorted against the sorted bookings, and the earliest N remain.
+
+def _next_slot(value):
+    minutes = current_app.config['APPOINTMENT_SLOT_MINUTES']
+    value = value.replace(second=0, microsecond=0)
+    late = (value.hour * 60 + value.minute) % minutes
+    return value + datetime.timedelta(minutes=minutes - late) if late else value
+
+def _free_in(doctors, windows, first, end, length):
+    # Free (start minute, doctor index) arrays for [first, end)
+    import numpy as np
+    owner, weekday, opens, closes = windows
+
+    # Pair every date with the windows falling on its weekday (1970-01-01 was a Thursday)
+    dates = np.arange(np.datetime64(first.date()), np.datetime64(end.date()))
+    date_index, window_index = np.nonzero(((dates.astype(np.int64) + 3) % 7)[:, None] == weekday[None, :])
+
+    # Cut each window into grid-aligned slots
+    slot_open = -(-opens[window_index] // length) * length
+    per_window = np.maximum((closes[window_index] - slot_open) // length, 0)
+    pair = np.repeat(np.arange(len(date_index)), per_window)
+    step = np.arange(per_window.sum()) - np.repeat(np.cumsum(per_window) - per_window, per_window)
+    starts = (dates[date_index[pair]].astype('datetime64[m]').astype(np.int64)
+              + slot_open[pair] + step * length)
+    slot_doctor = owner[window_index[pair]]
+
+    keep = starts >= np.datetime64(first, 'm').astype(np.int64)
+    starts, slot_doctor = starts[keep], slot_doctor[keep]
+
+    booked = db.session.query(Appointment.doctor_id, Appointment.date_time).filter(
+        Appointment.doctor_id.in_([doctor.id for doctor in doctors]),
+        Appointment.status == 'Scheduled',
+        Appointment.date_time > first - datetime.timedelta(minutes=length),
+        Appointment.date_time < end
+    ).all()
+    if booked:
+        # Drop slots overlapping a booking: with key = doctor * K + minute, a slot is taken
+        # when the first booking after (key - length) starts before (key + length)
+        doctor_ids = np.array([doctor.id for doctor in doctors])
+        order = np.argsort(doctor_ids)
+        booked_doctor = order[np.searchsorted(doctor_ids, np.array([row[0] for row in booked]), sorter=order)]
+        booked_start = np.array([row[1] for row in booked], dtype='datetime64[m]').astype(np.int64)
+        K = 1 << 32
+        booked_keys = np.sort(booked_doctor * K + booked_start)
+        keys = slot_doctor * K + starts
+        after = np.searchsorted(booked_keys, keys - length, side='right')
+        taken = booked_keys[np.minimum(after, len(booked_keys) - 1)]
+        free = (after == len(booked_keys)) | (taken >= keys + length)
+        starts, slot_doctor = starts[free], slot_doctor[free]
+    return starts, slot_doctor
+
+def free_slots(start, count, specialization=None, days=14):
+    # numpy is loaded on the first slot search rather than with the app
+    import numpy as np
+    length = current_app.config['APPOINTMENT_SLOT_MINUTES']
+    # A negative count would slice from the end below
+    count, days = max(1, count), max(1, days)
+    first = _next_slot(start)
+    midnight = datetime.datetime.combine(first.date(), datetime.time())
+
+    query = db.session.query(Doctor.id, User.username, Doctor.specialization, Doctor.availability_windows).join(Doctor.user)
+    if specialization:
+        query = query.filter(Doctor.specialization == specialization)
+    doctors = query.all()
+
+    # One row per (doctor, weekly window)
+    windows = [(i, *window) for i, doctor in enumerate(doctors) for window in availability.loads(doctor.availability_windows)]
+    if not windows:
+        return []
+    windows = np.array(windows, dtype=np.int64).T
+
+    # Look one day ahead, then twice as far each time until enough slots turn up, so the
+    # usual "next few slots" request only reads a day's bookings
+    span = 1
+    while True:
+        end = midnight + datetime.timedelta(days=min(span, days))
+        starts, slot_doctor = _free_in(doctors, windows, first, end, length)
+        if len(starts) >= count or span >= days:
+            break
+        span *= 2
+
+    # Earliest first, then by doctor
+    order = np.lexsort((slot_doctor, starts))[:count]
+    return [{
+        'doctor_id': doctors[i].id,
+        'doctor': doctors[i].username,
+        'specialization': doctors[i].specialization,
+        'start': np.datetime64(int(minute), 'm').astype(datetime.datetime).isoformat()
+    } for minute, i in zip(starts[order], slot_doctor[order])]
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from flask import current_app, request, Response, send_file, abort, url_for
+from werkzeug.security import safe_join
+from app import images
+
+try:
+    import brotli
+except ImportError: # optional; gzip only without it
+    brotli = None
+
+# Static files are fingerprinted: url_for('static', ...) appends ?v=<content hash>, and
+# a request carrying the current hash is served as immutable for a year, so browsers
+# stop revalidating CSS/JS/avatars on every navigation. Hashes (also the ETags) and
+# compressed copies of text assets are computed once per process, at startup.
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unversioned URLs stay cacheable but are revalidated (cheap 304s via the ETag)
+REVALIDATE = 'no-cache'
+
+# Built static URLs remembered per app; uploads make the set open-ended, so it is
+# emptied once it reaches this many
+STATIC_URLS = 4096
+# Likewise for the hashes of uploads that are not content-addressed (default.jpg,
+# older pictures)
+UPLOADS = 1024
+
+COMPRESSIBLE = ('text/css', 'text/javascript', 'application/javascript', 'image/svg+xml', 'application/json')
+
+# Uploaded pictures stored under their content hash never change (see app/images.py)
+CONTENT_ADDRESSED = re.compile(r'[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{%d}(_\w+)?\.\w+$' % images.HASH_LENGTH)
+
+class Asset:
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.etag = hashlib.sha256(data).hexdigest()[:16]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        # Encoded bodies for text assets, kept only where they actually save bytes
+        self.bodies = {}
+        if self.mimetype in COMPRESSIBLE:
+            self.bodies[None] = data
+            encoded = {'gzip': gzip.compress(data, 9, mtime=0)}
+            if brotli:
+                encoded['br'] = brotli.compress(data, quality=11)
+            self.bodies.update((name, body) for name, body in encoded.items() if len(body) < len(data))
+
+def init_app(app):
+    app.extensions['assets'] = {}
+    # Hash and compress everything shipped with the app; uploads are hashed on first use
+    for directory, subdirs, files in os.walk(app.static_folder):
+        subdirs[:] = [d for d in subdirs if d != images.FOLDER]
+        for name in files:
+            path = os.path.join(directory, name)
+            filename = os.path.relpath(path, app.static_folder).replace(os.sep, '/')
+            app.extensions['assets'][filename] = Asset(path)
+    app.extensions['uploads'] = {}
+    app.extensions['static_urls'] = {}
+
+    app.url_defaults(_add_version)
+    app.add_template_global(static_url)
+    app.view_functions['static'] = serve_static
+
+def static_path(filename):
+    # Pictures live wherever PICTURES_FOLDER points; everything else in app/static
+    prefix = images.FOLDER + '/'
+    if filename.startswith(prefix):
+        return safe_join(images.picture_path(''), filename[len(prefix):])
+    return safe_join(current_app.static_folder, filename)
+
+def get_asset(filename):
+    assets = current_app.extensions['assets']
+    if filename in assets and not current_app.debug:
+        return assets[filename]
+    # In debug mode every file is re-checked, to pick up edits to CSS/JS without a restart
+    if filename.startswith(images.FOLDER + '/') or current_app.debug:
+        return _get_upload(filename)
+    return None
+
+def _get_upload(filename):
+    # Uploads come and go (`flask images sweep`), so each use re-checks the file; a
+    # deleted one is dropped and served as a 404
+    uploads = current_app.extensions['uploads']
+    path = static_path(filename)
+    try:
+        found = os.stat(path) if path else None
+    except OSError:
+        found = None
+    if found is None or not stat.S_ISREG(found.st_mode):
+        uploads.pop(filename, None)
+        return None
+    asset = uploads.get(filename)
+    if asset is None or asset.mtime != found.st_mtime_ns:
+        if len(uploads) >= UPLOADS:
+            uploads.clear()
+        asset = uploads[filename] = Asset(path)
+    return asset
+
+def fingerprint(filename):
+    if CONTENT_ADDRESSED.search(filename):
+        return None # the name already changes with the content
+    asset = get_asset(filename)
+    return asset.etag if asset else None
+
+def static_url(filename):
+    # url_for('static', ...) for templates: list pages build one per avatar row, and the
+    # result only changes with the file's fingerprint and the script root
+    version = fingerprint(filename)
+    key = (request.script_root, filename, version)
+    urls = current_app.extensions['static_urls']
+    url = urls.get(key)
+    if url is None:
+        if len(urls) >= STATIC_URLS:
+            urls.clear()
+        url = urls[key] = url_for('static', filename=filename, **({'v': version} if version else {}))
+    return url
+
+def _add_version(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        version = fingerprint(values['filename'])
+        if version:
+            values['v'] = version
+
+def _encoding(asset):
+    for name in ('br', 'gzip'):
+        if name in asset.bodies and name in request.accept_encodings:
+            return name
+    return None
+
+def serve_static(filename):
+    if CONTENT_ADDRESSED.search(filename):
+        path = static_path(filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = send_file(path)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    asset = get_asset(filename)
+    if asset is None:
+        abort(404)
+
+    if asset.bodies:
+        encoding = _encoding(asset)
+        response = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(asset.etag + (f'-{encoding}' if encoding else ''))
+        response.make_conditional(request)
+    else:
+        response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.etag)
+
+    response.headers['Cache-Control'] = IMMUTABLE if request.args.get('v') == asset.etag else REVALIDATE
+    return response
@@ -0,0 +1,98 @@
+import json
+import re
+
+# Doctor.availability is free text such as "Mon-Fri 9am-5pm", "Mon, Wed 10:00-14:00"
+# or "Mon-Fri 9-5; Sat 9am-1pm". parse() turns it into weekly windows
+# [(weekday, start minute, end minute), ...] with Monday = 0, which are stored as
+# JSON in Doctor.availability_windows for the slot search.
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ALIASES = {
+    'daily': range(7), 'everyday': range(7),
+    'weekdays': range(5), 'weekday': range(5),
+    'weekends': range(5, 7), 'weekend': range(5, 7)
+}
+DEFAULT = 'Mon-Fri 9am-5pm'
+
+# Hours assumed when only days are given ("Mon-Fri")
+DEFAULT_HOURS = (9 * 60, 17 * 60)
+
+TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?'
+TIME_RANGE = re.compile(TIME + r'\s*(?:-|–|to)\s*' + TIME, re.IGNORECASE)
+
+def _day(token):
+    # "Mon", "Tues", "Thursday", ...
+    token = token.strip().lower().rstrip('.')
+    for index, day in enumerate(DAYS):
+        if len(token) >= 3 and day.startswith(token):
+            return index
+    raise ValueError(f'Unknown day "{token}"')
+
+def _days(text):
+    days = []
+    for part in re.split(r'[,/&]|\band\b', text):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part in ALIASES:
+            days.extend(ALIASES[part])
+        elif '-' in part:
+            first, last = (_day(token) for token in part.split('-', 1))
+            # Ranges may wrap past Sunday ("Fri-Mon")
+            days.extend((first + i) % 7 for i in range((last - first) % 7 + 1))
+        else:
+            days.append(_day(part))
+    if not days:
+        raise ValueError('No days given')
+    return days
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f'Invalid hour "{hour}{meridiem}"')
+        hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        raise ValueError(f'Invalid time "{hour}:{minute:02d}"')
+    return hour * 60 + minute
+
+def _hours(match):
+    start = _minutes(*match.group(1, 2, 3))
+    end = _minutes(*match.group(4, 5, 6))
+    # "9-5": a bare end hour earlier than the start is in the afternoon
+    if end <= start and not match.group(6) and int(match.group(4)) < 12:
+        end += 12 * 60
+    if end <= start:
+        raise ValueError('Closing time must be after opening time')
+    return start, end
+
+def parse(text):
+    windows = set()
+    for segment in (text or '').split(';'):
+        segment = segment.strip()
+        if not segment:
+            continue
+        match = TIME_RANGE.search(segment)
+        if match:
+            days, hours = segment[:match.start()], _hours(match)
+        else:
+            days, hours = segment, DEFAULT_HOURS
+        for day in _days(days):
+            windows.add((day, *hours))
+    if not windows:
+        raise ValueError('No availability given')
+    return sorted(windows)
+
+def parse_or_none(text):
+    # For stored data: unreadable text means "no bookable hours" rather than an error
+    try:
+        return parse(text)
+    except ValueError:
+        return None
+
+def dumps(windows):
+    # None (unreadable text) is stored as no windows at all
+    return json.dumps([list(window) for window in windows or []])
+
+def loads(value):
+    return [tuple(window) for window in json.loads(value)] if value else []
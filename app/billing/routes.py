@@ -1,35 +1,46 @@
 from flask import render_template, url_for, flash, redirect, request
-from app import db
+from app import db, identity
 from app.billing import billing
 from app.billing.forms import InvoiceForm
-from app.models import Invoice, Patient
+from app.models import Invoice
+from app.pagination import KeysetPage, keyset_paginate, filter_date_range, parse_date
 from flask_login import login_required, current_user
+from app.replica import read_only
+from app.cache import cached, conditional
 
 @billing.route("/invoices")
 @login_required
+@read_only
 def list_invoices():
     if current_user.role == 'admin' or current_user.role == 'receptionist':
-        invoices = Invoice.query.all()
+        query = Invoice.list_query()
     elif current_user.role == 'doctor':
         # Doctors might see all or none? Usually staff sees all. 
         # For now, let's say staff (admin/receptionist) manages billing.
         # But if doctors want to see, they can. Let's allow doctors too for now.
-        invoices = Invoice.query.all()
+        query = Invoice.list_query()
     else:
         # Patient
-        patient = Patient.query.filter_by(user_id=current_user.id).first()
-        if patient:
-            invoices = Invoice.query.filter_by(patient_id=patient.id).all()
-        else:
-            invoices = []
+        patient = identity.current().patient
+        query = Invoice.list_query().filter_by(patient_id=patient.id) if patient else None
+
+    if query is None:
+        page = KeysetPage([], None, None)
+    else:
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Invoice.status == status)
+        query = filter_date_range(query, Invoice.date_issued, parse_date('date_from'), parse_date('date_to'))
+        # date_issued leads so a date filter and the cursor seek the same index
+        page = keyset_paginate(query, [Invoice.date_issued, Invoice.id])
             
-    return render_template('billing/list.html', invoices=invoices)
+    return render_template('billing/list.html', invoices=page.items, page=page)
 
 @billing.route("/invoice/new", methods=['GET', 'POST'])
 @login_required
 def create_invoice():
     form = InvoiceForm()
-    form.patient.choices = [(p.id, p.name) for p in Patient.query.all()]
+    # Patients are picked through the search box (see app/choices.py)
     
     if form.validate_on_submit():
         invoice = Invoice(patient_id=form.patient.data, 
@@ -45,6 +56,9 @@ def create_invoice():
 
 @billing.route("/invoice/<int:invoice_id>")
 @login_required
+@read_only
+@conditional('invoice', 'patient', 'user')
+@cached('invoice', 'patient', 'user')
 def view_invoice(invoice_id):
     invoice = Invoice.query.get_or_404(invoice_id)
     return render_template('billing/view.html', invoice=invoice, title='Invoice Details')
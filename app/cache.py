@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from app import counters
+from app.events import models_committed
+
+# Rendered pages kept in process memory, least recently used first out once they
+# pass PAGE_CACHE_MAX_BYTES. Each entry lists the tables its page was built from and
+# is dropped when a commit touches one of them; PAGE_CACHE_TTL bounds how long other
+# workers' writes can go unnoticed.
+
+class CachedPage:
+    def __init__(self, body, status, headers, tables, expires):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.tables = tables
+        self.expires = expires
+
+    @property
+    def size(self):
+        return len(self.body)
+
+class PageCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped per table on every invalidation, so a page rendered across a commit
+        # to one of its tables is not stored
+        self._versions = defaultdict(int)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple(self._versions[t] for t in tables)
+
+    def set(self, key, entry, versions, max_bytes):
+        if entry.size > max_bytes:
+            return
+        with self._lock:
+            if tuple(self._versions[t] for t in entry.tables) != versions:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+            for key in [k for k, e in self._entries.items() if not e.tables.isdisjoint(tables)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, entries=len(self._entries), bytes=self.bytes)
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key).size
+
+page_cache = PageCache()
+
+def _cache_key(kwargs):
+    # The layout shows who is signed in, so pages are cached per user
+    user = current_user.get_id() if current_user.is_authenticated else None
+    return (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))), user)
+
+def cached(*tables):
+    # Serves a GET view from page_cache until a commit touches one of `tables`
+    tables = frozenset(tables)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            max_bytes = current_app.config['PAGE_CACHE_MAX_BYTES']
+            # A pending flash message has to be rendered into this response
+            if request.method != 'GET' or not max_bytes or session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            key = _cache_key(kwargs)
+            entry = page_cache.get(key)
+            if entry is not None:
+                response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            versions = page_cache.versions(tables)
+            # Render from the primary: a lagging replica could refill the entry with
+            # data older than the commit that just invalidated it
+            g.pop('read_only', None)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'text/html' and not response.is_streamed \
+                    and not session.get('_flashes'):
+                entry = CachedPage(response.get_data(), response.status_code, list(response.headers), tables,
+                                   time.monotonic() + current_app.config['PAGE_CACHE_TTL'])
+                page_cache.set(key, entry, versions, max_bytes)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated
+    return decorator
+
+def conditional(*tables):
+    # ETag from the versions of `tables` (see app/counters.py) plus who is asking; a
+    # matching If-None-Match is answered 304 after one primary-key lookup, before the
+    # view runs. The body is then always revalidated rather than reused blindly.
+    tables = sorted(tables)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+            user = (current_user.get_id(), current_user.role) if current_user.is_authenticated else None
+            # Also handed to the view, so it can check its own caches against them
+            g.table_versions = dict(zip(tables, counters.versions(tables)))
+            state = repr((request.endpoint, sorted(kwargs.items()), sorted(request.args.items(multi=True)), user,
+                          sorted(g.table_versions.items())))
+            etag = hashlib.sha1(state.encode()).hexdigest()[:20]
+
+            # A pending flash message has to be rendered, and must not be revalidated into a 304 later
+            if session.get('_flashes'):
+                return f(*args, **kwargs)
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated
+    return decorator
+
+@models_committed.connect
+def _on_models_committed(sender, tables):
+    page_cache.invalidate(tables)
@@ -0,0 +1,60 @@
+import threading
+from wtforms import SelectField
+from wtforms.validators import ValidationError
+from app import db
+from app.events import models_committed
+from app.models import Doctor, Patient, User
+
+# Dropdown data for the appointment and invoice forms. Doctors are few and change
+# rarely, so their choices are cached per process until a doctor/user write commits.
+# Patients are too many to list: the form holds only the chosen one and the rest are
+# found through /api/patients/search.
+
+DEPENDS_ON = frozenset(['doctor', 'user'])
+
+_doctor_choices = None
+_lock = threading.Lock()
+_generation = 0
+
+def doctor_choices():
+    global _doctor_choices
+    choices = _doctor_choices
+    if choices is not None:
+        return choices
+    with _lock:
+        generation = _generation
+        choices = [(doctor_id, f"{username} ({specialization})") for doctor_id, username, specialization in
+                   db.session.query(Doctor.id, User.username, Doctor.specialization).join(Doctor.user).order_by(User.username)]
+        # Don't keep a list read before a write that committed meanwhile
+        if generation == _generation:
+            _doctor_choices = choices
+        return choices
+
+def invalidate():
+    global _doctor_choices, _generation
+    _generation += 1
+    _doctor_choices = None
+
+@models_committed.connect
+def _on_models_committed(sender, tables):
+    if tables & DEPENDS_ON:
+        invalidate()
+
+class PatientSelectField(SelectField):
+    # Renders only the selected patient; a submitted id is checked with one primary-key
+    # lookup instead of against every patient. Set `allowed` to limit the ids accepted.
+    def __init__(self, label=None, validators=None, **kwargs):
+        super().__init__(label, validators, coerce=int, choices=[], validate_choice=False, **kwargs)
+        self.allowed = None
+
+    def select(self, patient):
+        # None (e.g. an appointment without a patient) leaves the field empty
+        self.data = patient.id if patient else None
+        self.choices = [(patient.id, patient.name)] if patient else []
+
+    def pre_validate(self, form):
+        patient = db.session.get(Patient, self.data) if self.data else None
+        if patient is None or (self.allowed is not None and patient.id not in self.allowed):
+            raise ValidationError('Please choose a patient from the search results.')
+        # Keep it selected if the form is shown again
+        self.choices = [(patient.id, patient.name)]
@@ -0,0 +1,71 @@
+import click
+from flask.cli import AppGroup
+
+stats_cli = AppGroup('stats', help='Maintain the dashboard counters.')
+
+@stats_cli.command('rebuild')
+def rebuild_stats():
+    """Recount the stats_counters table from the source tables."""
+    from app.counters import rebuild
+    values = rebuild()
+    click.echo(f"Rebuilt {len(values)} counters: {int(values['patients'])} patients, "
+               f"{int(values['appointments'])} appointments, {int(values['doctors'])} doctors, "
+               f"revenue {values['revenue']:.2f}")
+
+images_cli = AppGroup('images', help='Maintain uploaded profile pictures.')
+
+@images_cli.command('resize')
+def resize_images():
+    """Render the resized variants for pictures that don't have them yet."""
+    from app import db, images
+    from app.models import User, Patient
+    filenames = set()
+    for model in (User, Patient):
+        filenames.update(db.session.scalars(db.select(model.image_file).where(
+            model.image_file != 'default.jpg', model.image_sizes.is_(None))))
+    for filename in sorted(filenames):
+        try:
+            images.process(filename)
+        except OSError as e:
+            click.echo(f'Skipped {filename}: {e}')
+    click.echo(f'Processed {len(filenames)} pictures.')
+
+@images_cli.command('sweep')
+@click.option('--min-age', default=3600, show_default=True, help='Only remove files older than this many seconds.')
+@click.option('--dry-run', is_flag=True, help='List what would be removed without deleting anything.')
+def sweep_images(min_age, dry_run):
+    """Delete stored pictures that no user or patient refers to any more."""
+    from app import images
+    removed, freed = images.sweep(min_age=min_age, dry_run=dry_run)
+    for filename in removed:
+        click.echo(f"{'Would remove' if dry_run else 'Removed'} {filename}")
+    click.echo(f"{len(removed)} files, {freed / 1024:.1f} KiB {'reclaimable' if dry_run else 'freed'}.")
+
+jobs_cli = AppGroup('jobs', help='Maintain background import/export jobs.')
+
+@jobs_cli.command('cleanup')
+def cleanup_jobs():
+    """Fail jobs whose process has gone and delete expired export files."""
+    from app.jobs import worker
+    failed = worker.fail_orphans()
+    removed = worker.expire_files()
+    click.echo(f'Marked {failed} interrupted jobs failed, removed {len(removed)} expired files.')
+
+templates_cli = AppGroup('templates', help='Maintain the compiled template cache.')
+
+@templates_cli.command('compile')
+def compile_templates():
+    """Compile every template into the bytecode cache."""
+    from flask import current_app
+    from app import templating
+    count = templating.precompile(current_app)
+    click.echo(f'Compiled {count} templates into {templating.cache_dir(current_app)}.')
+
+patients_cli = AppGroup('patients', help='Maintain patient records.')
+
+@patients_cli.command('reindex')
+def reindex_patients():
+    """Rebuild the full-text search index from the patient table."""
+    from app.patient import search
+    count = search.rebuild()
+    click.echo(f'Indexed {count} patients.')
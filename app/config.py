@@ -4,3 +4,59 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess-secret-key-hms'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///hms.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool; unset values use the backend's profile in app/database.py
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = int(os.environ['DB_POOL_TIMEOUT']) if os.environ.get('DB_POOL_TIMEOUT') else None
+    DB_POOL_RECYCLE = int(os.environ['DB_POOL_RECYCLE']) if os.environ.get('DB_POOL_RECYCLE') else None
+    # Optional read replica for the @read_only views (see app/replica.py)
+    REPLICA_DATABASE_URI = os.environ.get('REPLICA_DATABASE_URL')
+    # Seconds a browser keeps reading from the primary after it wrote something
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    # Set on every SQLite connection (see app/database.py)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    # Seconds the dashboard figures are reused before being recomputed
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+    # Seconds between keep-alives on /api/dashboard/stream (figures are re-checked on each)
+    DASHBOARD_STREAM_HEARTBEAT = int(os.environ.get('DASHBOARD_STREAM_HEARTBEAT', 15))
+    DASHBOARD_STREAM_RETRY_MS = 5000
+    # Open streams per worker process; each holds a gthread thread, so past this many the
+    # stream answers 503 and the page polls /api/dashboard/stats instead (0 disables)
+    DASHBOARD_STREAMS_PER_WORKER = int(os.environ.get('DASHBOARD_STREAMS_PER_WORKER', 16))
+    # Seconds a signed-in user and their profile are reused between requests (0 disables;
+    # see app/identity.py)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+    # Memory for rendered pages (0 disables) and how long one is reused at most; local
+    # commits drop the affected pages straight away (see app/cache.py)
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))
+    # Statements slower than this are logged with the route that ran them (None disables;
+    # see app/instrumentation.py)
+    SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else 250
+    # Compiled templates kept between restarts (defaults to instance/jinja_cache), and
+    # whether gunicorn workers load them all before serving rather than on first use
+    # (see app/templating.py)
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    PRECOMPILE_TEMPLATES = True
+    # Threads running spreadsheet imports/exports (see app/jobs)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    # Seconds finished exports are kept in instance/jobs for download
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', 24 * 3600))
+    # Unfinished jobs whose process can't be checked (another host) are failed after this
+    JOB_ORPHAN_HOURS = int(os.environ.get('JOB_ORPHAN_HOURS', 6))
+    # Run jobs inside the request that enqueues them (tests)
+    JOBS_INLINE = False
+    # Processes hashing passwords during a doctor import (defaults to one per core)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    # Threads resizing uploaded profile pictures (see app/images.py)
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    # Resize in the request that uploads the picture (tests)
+    IMAGES_INLINE = False
+    # Where profile pictures are stored; must be what /static/profile_pics serves
+    # (defaults to app/static/profile_pics)
+    PICTURES_FOLDER = os.environ.get('PICTURES_FOLDER')
+    # Length of an appointment; bookings start on this grid (see app/appointment/slots.py)
+    APPOINTMENT_SLOT_MINUTES = 30
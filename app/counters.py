@@ -0,0 +1,179 @@
+import datetime
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Patient, Appointment, Doctor, Invoice, StatsCounter
+
+# Kept current by the mapper events below so the dashboard reads a handful of
+# primary-key rows instead of scanning patient/appointment/invoice.
+counters = StatsCounter.__table__
+
+def day_key(prefix, value):
+    return f"{prefix}:{value:%Y-%m-%d}"
+
+# INSERT ... ON CONFLICT DO UPDATE per dialect: two transactions creating the same new
+# row (e.g. the first booking of a day) must both count rather than one failing
+UPSERT = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def bump(connection, name, delta):
+    if not delta:
+        return
+    upsert = UPSERT.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(counters).values(name=name, value=delta)
+        connection.execute(statement.on_conflict_do_update(index_elements=[counters.c.name],
+                                                           set_={'value': counters.c.value + delta}))
+        return
+    result = connection.execute(counters.update().where(counters.c.name == name)
+                                .values(value=counters.c.value + delta))
+    if result.rowcount == 0:
+        connection.execute(counters.insert().values(name=name, value=delta))
+
+def read(names):
+    rows = db.session.execute(select(counters.c.name, counters.c.value).where(counters.c.name.in_(names)))
+    values = dict.fromkeys(names, 0)
+    values.update(rows.all())
+    return values
+
+def _old_value(target, attr):
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+def _patient_day(target):
+    # date_created is filled in by the database (UTC CURRENT_TIMESTAMP), so it is
+    # usually not loaded yet when the insert event runs
+    created = target.__dict__.get('date_created')
+    if not isinstance(created, datetime.datetime):
+        created = datetime.datetime.utcnow()
+    return day_key('patients', created)
+
+# Patients
+
+@event.listens_for(Patient, 'after_insert')
+def _patient_inserted(mapper, connection, target):
+    bump(connection, 'patients', 1)
+    bump(connection, _patient_day(target), 1)
+
+@event.listens_for(Patient, 'after_delete')
+def _patient_deleted(mapper, connection, target):
+    bump(connection, 'patients', -1)
+    bump(connection, _patient_day(target), -1)
+
+# Doctors
+
+@event.listens_for(Doctor, 'after_insert')
+def _doctor_inserted(mapper, connection, target):
+    bump(connection, 'doctors', 1)
+
+@event.listens_for(Doctor, 'after_delete')
+def _doctor_deleted(mapper, connection, target):
+    bump(connection, 'doctors', -1)
+
+# Appointments
+
+@event.listens_for(Appointment, 'after_insert')
+def _appointment_inserted(mapper, connection, target):
+    bump(connection, 'appointments', 1)
+    bump(connection, day_key('appointments', target.date_time), 1)
+
+@event.listens_for(Appointment, 'after_update')
+def _appointment_updated(mapper, connection, target):
+    old = _old_value(target, 'date_time')
+    if old is not None and old.date() != target.date_time.date():
+        bump(connection, day_key('appointments', old), -1)
+        bump(connection, day_key('appointments', target.date_time), 1)
+
+@event.listens_for(Appointment, 'after_delete')
+def _appointment_deleted(mapper, connection, target):
+    bump(connection, 'appointments', -1)
+    bump(connection, day_key('appointments', target.date_time), -1)
+
+# Invoices
+
+@event.listens_for(Invoice, 'after_insert')
+def _invoice_inserted(mapper, connection, target):
+    bump(connection, 'revenue', target.amount)
+
+@event.listens_for(Invoice, 'after_update')
+def _invoice_updated(mapper, connection, target):
+    old = _old_value(target, 'amount')
+    if old is not None:
+        bump(connection, 'revenue', target.amount - old)
+
+@event.listens_for(Invoice, 'after_delete')
+def _invoice_deleted(mapper, connection, target):
+    bump(connection, 'revenue', -target.amount)
+
+# Bulk inserts (spreadsheet imports) skip the mapper events, so they report here
+
+def patients_added(connection, count):
+    bump(connection, 'patients', count)
+    bump(connection, day_key('patients', datetime.datetime.utcnow()), count)
+
+def doctors_added(connection, count):
+    bump(connection, 'doctors', count)
+
+# Table versions: 'version:<table>' goes up by one in every transaction that writes to
+# the table, so a set of versions identifies the data a page was built from (ETags,
+# see app/cache.py). Bumped in the writing transaction itself, so they roll back with it.
+# On PostgreSQL that row stays locked until the transaction ends, so concurrent writes
+# to one table queue on it, as they already do on the 'patients' style counters above.
+
+def version_key(table):
+    return f"version:{table}"
+
+def versions(tables):
+    values = read([version_key(t) for t in tables])
+    return tuple(int(values[version_key(t)]) for t in tables)
+
+def _bump_versions(session):
+    # Tables written since the last call in this transaction (see app/events.py);
+    # runs after each flush and once more at commit for bulk writes
+    changed = session.info.get('changed_tables')
+    if not changed:
+        return
+    done = session.info.setdefault('versioned_tables', set())
+    pending = changed - done
+    if pending:
+        connection = session.connection()
+        for table in sorted(pending):
+            bump(connection, version_key(table), 1)
+        done.update(pending)
+
+@event.listens_for(Session, 'after_flush')
+def _versions_after_flush(session, flush_context):
+    _bump_versions(session)
+
+@event.listens_for(Session, 'before_commit')
+def _versions_before_commit(session):
+    _bump_versions(session)
+
+@event.listens_for(Session, 'after_commit')
+def _versions_committed(session):
+    session.info.pop('versioned_tables', None)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _versions_rolled_back(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('versioned_tables', None)
+
+def rebuild():
+    # Recount everything from the source tables (full scans; CLI use only)
+    values = {
+        'patients': db.session.scalar(select(func.count()).select_from(Patient)),
+        'appointments': db.session.scalar(select(func.count()).select_from(Appointment)),
+        'doctors': db.session.scalar(select(func.count()).select_from(Doctor)),
+        'revenue': db.session.scalar(select(func.coalesce(func.sum(Invoice.amount), 0)))
+    }
+    for prefix, column in [('appointments', Appointment.date_time), ('patients', Patient.date_created)]:
+        day = func.date(column)
+        for d, c in db.session.execute(select(day, func.count()).group_by(day)):
+            values[f"{prefix}:{d}"] = c
+
+    # Versions aren't derived from the data; resetting them could repeat old ETags
+    db.session.execute(counters.delete().where(~counters.c.name.startswith('version:')))
+    db.session.execute(counters.insert(), [{'name': k, 'value': v} for k, v in values.items()])
+    db.session.commit()
+    return values
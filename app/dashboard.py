@@ -0,0 +1,125 @@
+import datetime
+import queue
+import threading
+import time
+from flask import current_app
+from app import counters
+from app.counters import day_key, version_key
+from app.events import models_committed
+from app.replica import primary
+
+# Tables whose writes make the cached figures stale
+DEPENDS_ON = frozenset(['patient', 'appointment', 'doctor', 'invoice'])
+
+_cache = {}
+_lock = threading.Lock()
+_generation = 0
+
+def compute_stats(now=None):
+    now = now or datetime.datetime.now()
+    today = now.date()
+    utc_today = datetime.datetime.utcnow().date()
+    dates = [today - datetime.timedelta(days=i) for i in range(6, -1, -1)]
+    # Patient buckets follow date_created, which the database stamps in UTC
+    patient_days = [day_key('patients', utc_today - datetime.timedelta(days=i)) for i in range(7)]
+    appointment_days = [day_key('appointments', d) for d in dates]
+
+    # Every figure comes from pre-aggregated rows in a single primary-key lookup
+    version_keys = [version_key(t) for t in DEPENDS_ON]
+    values = counters.read(['patients', 'appointments', 'doctors', 'revenue'] + patient_days + appointment_days
+                           + version_keys)
+    counts = [int(values[k]) for k in appointment_days]
+
+    return {
+        'patients': int(values['patients']),
+        'appointments': int(values['appointments']),
+        'doctors': int(values['doctors']),
+        'revenue': int(values['revenue']),
+        'new_patients': int(sum(values[k] for k in patient_days)),
+        'todays_appointments': counts[-1],
+        'chart_labels': [d.strftime('%a') for d in dates], # Mon, Tue
+        'chart_data': counts,
+        # The table versions these figures were read at
+        'versions': {t: int(values[version_key(t)]) for t in DEPENDS_ON}
+    }
+
+def _fresh(entry, key, versions):
+    # Versions only go up; an entry read at or after the given ones is current. The given
+    # versions may come from a lagging replica.
+    return entry and entry[0] == key and entry[1] > time.monotonic() and \
+        (versions is None or all(entry[2]['versions'][t] >= v for t, v in versions.items()))
+
+def get_stats(versions=None):
+    # Cached per process for DASHBOARD_CACHE_TTL seconds; the entry is also keyed by
+    # date so the chart rolls over at midnight. Given the current table versions, a
+    # cached entry from before another worker's write is recomputed too.
+    key = datetime.date.today()
+    entry = _cache.get('stats')
+    if _fresh(entry, key, versions):
+        return entry[2]
+
+    with _lock:
+        # Another thread may have refreshed it while we waited
+        entry = _cache.get('stats')
+        if _fresh(entry, key, versions):
+            return entry[2]
+        generation = _generation
+        # From the primary: figures read off a lagging replica would be cached as current
+        with primary():
+            stats = compute_stats()
+        # Don't store figures computed before a write that committed meanwhile
+        if generation == _generation:
+            _cache['stats'] = (key, time.monotonic() + current_app.config['DASHBOARD_CACHE_TTL'], stats)
+        return stats
+
+def invalidate():
+    global _generation
+    _generation += 1
+    _cache.clear()
+
+def api_payload(stats):
+    # The subset served by /api/dashboard/stats and pushed on /api/dashboard/stream
+    return {
+        'patients': stats['patients'],
+        'appointments': stats['appointments'],
+        'doctors': stats['doctors'],
+        'revenue': stats['revenue']
+    }
+
+class StatsBroker:
+    # In-process pub/sub: every open dashboard stream owns a one-slot queue that is
+    # nudged when a relevant commit lands. A full queue already has a pending wake-up,
+    # so bursts of writes collapse into a single push.
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, limit=None):
+        # None once `limit` subscribers are already connected
+        q = queue.Queue(maxsize=1)
+        with self._lock:
+            if limit and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(True)
+            except queue.Full:
+                pass
+
+broker = StatsBroker()
+
+@models_committed.connect
+def _on_models_committed(sender, tables):
+    if tables & DEPENDS_ON:
+        invalidate()
+        broker.publish()
@@ -0,0 +1,75 @@
+import os
+from functools import partial
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from app import db
+
+# Engine settings per database backend. Each gunicorn worker has its own pool, so the
+# PostgreSQL pool stays small enough for every worker to fit within max_connections.
+# SQLite connections are cheap and the threaded workers can run GUNICORN_THREADS
+# requests at once, so its pool is wider. Any DB_POOL_* setting overrides these.
+PROFILES = {
+    'sqlite': dict(pool_size=10, max_overflow=30, pool_timeout=30),
+    'postgresql': dict(pool_size=5, max_overflow=10, pool_timeout=30, pool_pre_ping=True, pool_recycle=1800),
+}
+
+# Engine option -> config key
+POOL_SETTINGS = {
+    'pool_size': 'DB_POOL_SIZE',
+    'max_overflow': 'DB_MAX_OVERFLOW',
+    'pool_timeout': 'DB_POOL_TIMEOUT',
+    'pool_recycle': 'DB_POOL_RECYCLE',
+}
+
+def in_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def engine_options(config, uri):
+    url = make_url(uri)
+    # In-memory SQLite runs on a single shared connection (StaticPool) with no pool to size
+    if in_memory(url):
+        return {}
+    options = dict(PROFILES.get(url.get_backend_name(), {}))
+    for option, key in POOL_SETTINGS.items():
+        if config.get(key) is not None:
+            options[option] = config[key]
+    return options
+
+def set_sqlite_pragmas(config, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Wait for a competing writer instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    # Readers keep reading while a write commits; kept in the file once set
+    # (in-memory databases stay in 'memory' mode)
+    cursor.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode NORMAL only syncs at checkpoints: a power cut can lose the last
+    # commits but never corrupts the file
+    cursor.execute(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size = -{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    cursor.execute(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+def init_app(app):
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS win over the profile
+    options = engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI'])
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', partial(set_sqlite_pragmas, app.config))
+
+def make_engine(app, uri):
+    # An engine outside Flask-SQLAlchemy (the read replica) set up like the main one
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and not in_memory(url) and not os.path.isabs(url.database):
+        # Relative SQLite paths live in the instance folder, as for SQLALCHEMY_DATABASE_URI
+        url = url.set(database=os.path.join(app.instance_path, url.database))
+    engine = create_engine(url, **engine_options(app.config, uri))
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', partial(set_sqlite_pragmas, app.config))
+    return engine
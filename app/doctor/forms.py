@@ -2,10 +2,17 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, SelectField, PasswordField
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
 from app.models import User
+from app import availability
+
+def valid_availability(form, field):
+    try:
+        availability.parse(field.data)
+    except ValueError as e:
+        raise ValidationError(f'{e}. Use a format like "Mon-Fri 9am-5pm; Sat 9am-1pm".')
 
 class DoctorForm(FlaskForm):
     specialization = StringField('Specialization', validators=[DataRequired()])
-    availability = StringField('Availability (e.g., Mon-Fri 9-5)', validators=[DataRequired()])
+    availability = StringField('Availability (e.g., Mon-Fri 9-5)', validators=[DataRequired(), valid_availability])
     submit = SubmitField('Save Profile')
 
 class AddDoctorForm(FlaskForm):
@@ -14,7 +21,7 @@ class AddDoctorForm(FlaskForm):
     password = PasswordField('Password', validators=[DataRequired()])
     confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
     specialization = StringField('Specialization', validators=[DataRequired()])
-    availability = StringField('Availability', validators=[DataRequired()])
+    availability = StringField('Availability', validators=[DataRequired(), valid_availability])
     submit = SubmitField('Add Doctor')
 
     def validate_username(self, username):
@@ -31,7 +38,7 @@ class UpdateDoctorForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=2, max=20)])
     email = StringField('Email', validators=[DataRequired(), Email()])
     specialization = StringField('Specialization', validators=[DataRequired()])
-    availability = StringField('Availability', validators=[DataRequired()])
+    availability = StringField('Availability', validators=[DataRequired(), valid_availability])
     submit = SubmitField('Update Doctor')
 
     def __init__(self, original_username, original_email, *args, **kwargs):
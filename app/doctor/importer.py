@@ -0,0 +1,108 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import insert, select, or_
+from werkzeug.security import generate_password_hash
+from app import db, counters, availability
+from app.imports import ImportResult, check_columns, clean_text, repeats, row_numbers, bulk_inserted
+from app.models import User, Doctor
+
+REQUIRED_COLUMNS = ['Username', 'Email', 'Password', 'Specialization', 'Availability']
+DEFAULT_AVAILABILITY = availability.DEFAULT
+
+# Rows per duplicate lookup / INSERT batch / commit
+CHUNK_SIZE = 1000
+
+# Below this many passwords, starting worker processes costs more than it saves
+PARALLEL_HASH_MIN = 32
+
+def normalize(df):
+    # Column-wise cleaning; returns the cleaned frame plus the reject reason per row
+    import pandas as pd
+    out = pd.DataFrame(index=df.index)
+    out['username'] = clean_text(df['Username'])
+    out['email'] = clean_text(df['Email'])
+    # Passwords are kept verbatim (no stripping); numbers read from Excel become text
+    out['password'] = df['Password'].map(lambda value: None if pd.isna(value) or value == '' else str(value))
+    out['specialization'] = clean_text(df['Specialization'])
+    out['availability'] = clean_text(df['Availability']).fillna(DEFAULT_AVAILABILITY)
+
+    reason = pd.Series(pd.NA, index=df.index, dtype='object')
+    reason = reason.mask(out['username'].str.len() > 20, 'Username is too long')
+    reason = reason.mask(out['password'].isna(), 'Missing password')
+    reason = reason.mask(out['username'].isna() | out['email'].isna() | out['specialization'].isna(),
+                         'Missing username, email or specialization')
+    # A username or email may only appear once in the file
+    reason = reason.mask(repeats(out, reason, 'username', 'email'), 'Duplicate row in file')
+    return out, reason
+
+def existing_accounts(doctors):
+    # Usernames and emails already taken, looked up a chunk at a time so the IN lists
+    # stay under SQLite's bound-parameter limit (one query for most files)
+    usernames, emails = set(), set()
+    for start in range(0, len(doctors), CHUNK_SIZE):
+        chunk = doctors.iloc[start:start + CHUNK_SIZE]
+        rows = db.session.execute(select(User.username, User.email).where(or_(
+            User.username.in_(chunk['username'].tolist()),
+            User.email.in_(chunk['email'].tolist())
+        ))).all()
+        usernames.update(row.username for row in rows)
+        emails.update(row.email for row in rows)
+    return usernames, emails
+
+def hash_passwords(passwords, pool=None):
+    # generate_password_hash is deliberately slow, so large files spread it over every core
+    if pool is None:
+        return [generate_password_hash(password) for password in passwords]
+    return list(pool.map(generate_password_hash, passwords, chunksize=16))
+
+def hash_pool(count):
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if count < PARALLEL_HASH_MIN or workers < 2:
+        return None
+    # Spawned rather than forked: imports run on a thread of a multithreaded server
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def import_doctors(df, progress=None):
+    result = ImportResult()
+    check_columns(df, REQUIRED_COLUMNS)
+
+    doctors, reason = normalize(df.reset_index(drop=True))
+    result.reject_reasons(reason)
+    doctors = doctors[reason.isna()]
+
+    usernames, emails = existing_accounts(doctors)
+    taken = doctors['username'].isin(usernames) | doctors['email'].isin(emails)
+    result.reject(row_numbers(doctors.index[taken]), 'Username or email already exists')
+    doctors = doctors[~taken]
+
+    pool = hash_pool(len(doctors))
+    try:
+        for start in range(0, len(doctors), CHUNK_SIZE):
+            chunk = doctors.iloc[start:start + CHUNK_SIZE]
+            hashes = hash_passwords(chunk['password'].tolist(), pool)
+
+            # One multi-row INSERT per table; RETURNING hands back the new user ids in row order
+            user_ids = db.session.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{'username': username, 'email': email, 'password_hash': password_hash, 'role': 'doctor'}
+                 for username, email, password_hash in zip(chunk['username'], chunk['email'], hashes)]
+            ).all()
+            # Bulk inserts skip Doctor's validator, so the windows are parsed here
+            db.session.execute(insert(Doctor), [
+                {'user_id': user_id, 'specialization': specialization, 'availability': text,
+                 'availability_windows': availability.dumps(availability.parse_or_none(text))}
+                for user_id, specialization, text in zip(user_ids, chunk['specialization'], chunk['availability'])
+            ])
+            bulk_inserted(counters.doctors_added, len(chunk), 'user', 'doctor')
+            result.inserted += len(chunk)
+            db.session.commit()
+
+            if progress:
+                progress(min(start + CHUNK_SIZE, len(doctors)), len(doctors))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    result.rejects.sort()
+    return result
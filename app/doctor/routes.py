@@ -1,17 +1,28 @@
-from flask import render_template, request, flash, redirect, url_for, abort, send_file
-import pandas as pd
-from io import BytesIO
+from flask import Response, stream_with_context, render_template, request, flash, redirect, url_for, abort, send_file
 from app.doctor import doctor
 from app.doctor.forms import DoctorForm, AddDoctorForm, UpdateDoctorForm
+from app.doctor import tasks
+from app.jobs.worker import create_job, enqueue, job_path
+from app.jobs.routes import job_started
+from app import exports
 from app.models import Doctor, User
-from app import db
+from app.pagination import keyset_paginate
+from app import db, identity
 from flask_login import login_required, current_user
+from app.replica import read_only
+from app.cache import cached
 
 @doctor.route("/doctors")
 @login_required
+@read_only
+@cached('doctor', 'user')
 def list_doctors():
-    doctors = Doctor.query.all()
-    return render_template('doctor/list.html', doctors=doctors)
+    query = Doctor.list_query()
+    specialization = request.args.get('specialization')
+    if specialization:
+        query = query.filter(Doctor.specialization == specialization)
+    page = keyset_paginate(query, [Doctor.id])
+    return render_template('doctor/list.html', doctors=page.items, page=page)
 
 @doctor.route("/doctor/profile", methods=['GET', 'POST'])
 @login_required
@@ -20,7 +31,7 @@ def profile():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.home'))
         
-    doctor_profile = Doctor.query.filter_by(user_id=current_user.id).first()
+    doctor_profile = identity.current().doctor
     if not doctor_profile:
         # Create if missing (shouldn't happen usually if created properly)
         doctor_profile = Doctor(user_id=current_user.id, specialization="General", availability="Mon-Fri")
@@ -116,17 +127,10 @@ def download_doctor_template():
     if current_user.role != 'admin':
         abort(403)
     
-    # Create a DataFrame with the required columns
+    # Header row only; users fill it in and upload it to the import
     columns = ['Username', 'Email', 'Password', 'Specialization', 'Availability']
-    df = pd.DataFrame(columns=columns)
-    
-    # Create a BytesIO buffer to hold the Excel file
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Doctors_Template')
-        
-    output.seek(0)
-    
+    output = exports.template_xlsx('Doctors_Template', columns)
+
     return send_file(output, as_attachment=True, download_name="doctor_template.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 
@@ -147,40 +151,11 @@ def import_doctors():
         return redirect(url_for('doctor.list_doctors'))
         
     if file and file.filename.endswith('.xlsx'):
-        try:
-            df = pd.read_excel(file)
-            
-            # Check if required columns exist
-            required_columns = ['Username', 'Email', 'Password', 'Specialization', 'Availability']
-            if not all(col in df.columns for col in required_columns):
-                flash('Invalid file format. Please use the template.', 'danger')
-                return redirect(url_for('doctor.list_doctors'))
-            
-            count = 0
-            for index, row in df.iterrows():
-                # Check for existing user
-                existing_user = User.query.filter((User.username == row['Username']) | (User.email == row['Email'])).first()
-                if existing_user:
-                    continue # Skip duplicates
-                
-                # Create User
-                user = User(username=row['Username'], email=row['Email'], role='doctor')
-                user.set_password(str(row['Password'])) # Ensure password is string
-                db.session.add(user)
-                db.session.flush() # Get ID
-                
-                # Create Doctor
-                doctor = Doctor(user_id=user.id, 
-                                specialization=row['Specialization'], 
-                                availability=row.get('Availability', 'Mon-Fri 9am-5pm'))
-                db.session.add(doctor)
-                count += 1
-                
-            db.session.commit()
-            flash(f'{count} doctors imported successfully!', 'success')
-            
-        except Exception as e:
-            flash(f'Error importing file: {str(e)}', 'danger')
+        job = create_job('doctor_import', current_user.id)
+        path = job_path(job.id, '.xlsx')
+        file.save(path)
+        enqueue(job, tasks.run_import, path)
+        return job_started(job, 'Import started. This page updates as rows are processed.')
     else:
         flash('Invalid file type. Please upload an Excel file (.xlsx)', 'danger')
         
@@ -189,28 +164,17 @@ def import_doctors():
 
 @doctor.route("/doctor/export")
 @login_required
+@read_only
 def export_doctors():
     if current_user.role != 'admin':
         abort(403)
         
-    doctors = Doctor.query.all()
-    
-    data = []
-    for doctor in doctors:
-        data.append({
-            'Username': doctor.user.username,
-            'Email': doctor.user.email,
-            'Specialization': doctor.specialization,
-            'Availability': doctor.availability
-        })
-        
-    df = pd.DataFrame(data)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Doctors')
-        
-    output.seek(0)
-    
-    return send_file(output, as_attachment=True, download_name="doctors_export.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    if request.args.get('format') == 'csv':
+        # CSV needs no workbook, so it goes out in chunks as the rows are read
+        rows = exports.csv_stream(tasks.EXPORT_COLUMNS, tasks.export_statement())
+        return Response(stream_with_context(rows), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=doctors_export.csv'})
 
+    job = create_job('doctor_export', current_user.id)
+    enqueue(job, tasks.run_export)
+    return job_started(job, 'Export started. The download will be ready here shortly.')
@@ -0,0 +1,41 @@
+import os
+from app import exports
+from app.jobs.worker import job_path, report_progress, record_errors
+from app.models import Doctor, User
+from app.doctor import importer
+
+def run_import(job, path):
+    import pandas as pd
+    try:
+        df = pd.read_excel(path)
+    finally:
+        os.remove(path)
+    if not all(col in df.columns for col in importer.REQUIRED_COLUMNS):
+        raise ValueError('Invalid file format. Please use the template.')
+
+    report_progress(job, 0, len(df))
+    result = importer.import_doctors(df, progress=lambda done, total: report_progress(job, done))
+    job.processed = len(df)
+    record_errors(job, result.rejects)
+    job.message = f'{result.inserted} doctors imported successfully!'
+
+EXPORT_COLUMNS = [
+    ('Username', User.username),
+    ('Email', User.email),
+    ('Specialization', Doctor.specialization),
+    ('Availability', Doctor.availability)
+]
+
+def export_statement():
+    # User columns come from the join instead of a lazy load per doctor
+    return exports.export_statement(EXPORT_COLUMNS).join(Doctor.user).order_by(Doctor.id)
+
+def run_export(job):
+    statement = export_statement()
+    report_progress(job, 0, exports.count_rows(statement))
+
+    path = job_path(job.id, '.xlsx')
+    job.processed = exports.write_xlsx(path, 'Doctors', EXPORT_COLUMNS, statement)
+    job.result_file = path
+    job.download_name = 'doctors_export.xlsx'
+    job.message = f'{job.processed} doctors exported.'
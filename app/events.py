@@ -0,0 +1,33 @@
+from itertools import chain
+from blinker import Namespace
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_signals = Namespace()
+
+# Sent after every successful commit that wrote to the database, with `tables`
+# holding the names of the tables touched by that transaction.
+models_committed = _signals.signal('models-committed')
+
+def mark_changed(session, *tables):
+    # For writes the unit of work can't see (bulk inserts, raw SQL)
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    changed = session.info.setdefault('changed_tables', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table and (obj not in session.dirty or session.is_modified(obj)):
+            changed.add(table)
+
+@event.listens_for(Session, 'after_commit')
+def _send_committed(session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        models_committed.send(session, tables=frozenset(tables))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('changed_tables', None)
@@ -0,0 +1,68 @@
+import csv
+import io
+from sqlalchemy import select, func
+from app import db
+
+# Rows fetched from the cursor (and written out) at a time
+BATCH_SIZE = 1000
+
+# xlsxwriter (and pandas, numpy, PIL elsewhere) is imported where it is used rather than
+# at module level, so app startup and CLI commands don't load it (see
+# benchmarks/startup.py).
+
+# Exports are described as [(spreadsheet header, column), ...] and read with column-only
+# SELECTs, so no ORM objects are built and memory stays flat however many rows there are.
+
+def export_statement(columns):
+    return select(*[column for header, column in columns])
+
+def count_rows(statement):
+    return db.session.scalar(select(func.count()).select_from(statement.subquery()))
+
+def iter_rows(statement):
+    # yield_per keeps only one batch of rows buffered at a time
+    return db.session.execute(statement.execution_options(yield_per=BATCH_SIZE))
+
+def csv_stream(columns, statement):
+    # Generator for a chunked response: one piece per batch of rows
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, column in columns])
+    result = db.session.execute(statement.execution_options(yield_per=BATCH_SIZE))
+    for batch in result.partitions():
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def write_xlsx(path, sheet_name, columns, statement):
+    # constant_memory flushes each row to disk as soon as the next one starts. Nothing
+    # may commit while the cursor is open, so progress is only reported afterwards.
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        sheet = workbook.add_worksheet(sheet_name)
+        bold = workbook.add_format({'bold': True})
+        for col, (header, column) in enumerate(columns):
+            sheet.write_string(0, col, header, bold)
+        count = 0
+        for count, row in enumerate(iter_rows(statement), 1):
+            sheet.write_row(count, 0, row)
+        return count
+    finally:
+        workbook.close()
+
+def template_xlsx(sheet_name, headers):
+    # An empty sheet with just the header row, for users to fill in and import
+    import xlsxwriter
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    sheet = workbook.add_worksheet(sheet_name)
+    bold = workbook.add_format({'bold': True})
+    for col, header in enumerate(headers):
+        sheet.write_string(0, col, header, bold)
+    workbook.close()
+    output.seek(0)
+    return output
@@ -0,0 +1,104 @@
+import threading
+import time
+from flask import current_app, g
+from flask_login import current_user
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db, login_manager
+from app.events import models_committed
+from app.models import User, Patient, Doctor
+
+# Who is making the request: the user plus their patient/doctor profile, read with one
+# joined query. The rows are cached per process for USER_CACHE_TTL seconds and copied
+# into each request's session without touching the database. Account and profile
+# writes in this process clear the cache; other processes catch up within the TTL.
+
+DEPENDS_ON = frozenset(['user', 'patient', 'doctor'])
+
+# user id -> (expiry, (user, patient, doctor) column values)
+_cache = {}
+_lock = threading.Lock()
+_generation = 0
+
+def _columns(obj):
+    if obj is None:
+        return None
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+def _detached(model, values):
+    if values is None:
+        return None
+    # Skip __init__ (and the validators it runs); the values are already as stored
+    obj = inspect(model).class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return obj
+
+def _load(user_id):
+    return db.session.scalars(select(User).where(User.id == user_id).options(
+        joinedload(User.patient_profile), joinedload(User.doctor_profile))).first()
+
+def _attach(row):
+    # Rebuild the cached rows as clean, already-loaded objects in this request's session
+    user, patient, doctor = (_detached(model, values) for model, values in zip((User, Patient, Doctor), row))
+    set_committed_value(user, 'patient_profile', patient)
+    set_committed_value(user, 'doctor_profile', doctor)
+    if patient is not None:
+        set_committed_value(patient, 'user', user)
+    if doctor is not None:
+        set_committed_value(doctor, 'user', user)
+    return db.session.merge(user, load=False)
+
+@login_manager.user_loader
+def load_user(user_id):
+    user_id = int(user_id)
+    ttl = current_app.config['USER_CACHE_TTL']
+    entry = _cache.get(user_id)
+    if entry and entry[0] > time.monotonic():
+        return _attach(entry[1])
+
+    generation = _generation
+    user = _load(user_id)
+    if user is not None and ttl:
+        row = (_columns(user), _columns(user.patient_profile), _columns(user.doctor_profile))
+        with _lock:
+            # Don't store rows read before a write that committed meanwhile
+            if generation == _generation:
+                _cache[user_id] = (time.monotonic() + ttl, row)
+    return user
+
+def invalidate():
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+@models_committed.connect
+def _on_models_committed(sender, tables):
+    if tables & DEPENDS_ON:
+        invalidate()
+
+class Identity:
+    def __init__(self, user):
+        self.user = user
+        self.authenticated = user.is_authenticated
+        self.role = user.role if self.authenticated else None
+
+    @property
+    def patient(self):
+        # The signed-in user's own patient record, if they have one
+        return self.user.patient_profile if self.authenticated else None
+
+    @property
+    def doctor(self):
+        return self.user.doctor_profile if self.authenticated else None
+
+def current():
+    # Built once per request from current_user, whose profiles were loaded with it
+    # (and again if the request logs someone in or out)
+    user = current_user._get_current_object()
+    if g.get('identity') is None or g.identity.user is not user:
+        g.identity = Identity(user)
+    return g.identity
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from wtforms.validators import ValidationError
+from app import db
+from app.events import mark_changed
+from app.models import User, Patient
+
+# Uploads are stored under the hash of their content, sharded two levels deep
+# (profile_pics/ab/cd/abcd....jpg), so identical pictures share one file and no
+# directory grows without bound. Files nothing refers to any more are removed by
+# `flask images sweep`.
+#
+# Profile pictures are resized off the request: the upload is written as-is and, once
+# the row pointing at it has committed, a pool thread renders square JPEG + WebP copies
+# per display size and records them in `image_sizes`. Until then pages show the upload.
+
+FOLDER = 'profile_pics'
+DEFAULT = 'default.jpg'
+
+# Hex digits of the SHA-256 kept in the filename (128 bits)
+HASH_LENGTH = 32
+
+# Square renditions in px, about 2x the largest CSS size each is used at:
+# sm - navbar and patient list, md - doctor cards and profile, lg - patient page
+SIZES = {'sm': 112, 'md': 192, 'lg': 384}
+
+FORMATS = {
+    'jpg': dict(format='JPEG', quality=85, optimize=True, progressive=True),
+    'webp': dict(format='WEBP', quality=80, method=4)
+}
+
+def init_app(app):
+    app.extensions['images'] = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'],
+                                                  thread_name_prefix='images')
+    app.add_template_global(avatar_url)
+
+def picture_path(filename):
+    root = current_app.config['PICTURES_FOLDER'] or os.path.join(current_app.static_folder, FOLDER)
+    return os.path.join(root, filename)
+
+def variant_name(filename, size, ext):
+    stem, _ = os.path.splitext(filename)
+    return f'{stem}_{size}.{ext}'
+
+def content_name(digest, ext):
+    return f'{digest[:2]}/{digest[2:4]}/{digest[:HASH_LENGTH]}{ext}'
+
+def store_upload(file_storage):
+    # Hash while copying to a temporary file, then move it under its content name
+    # unless an identical picture is already stored
+    ext = os.path.splitext(file_storage.filename)[1].lower()
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=picture_path(''))
+    with os.fdopen(fd, 'wb') as out:
+        for chunk in iter(lambda: file_storage.stream.read(64 * 1024), b''):
+            digest.update(chunk)
+            out.write(chunk)
+
+    filename = content_name(digest.hexdigest(), ext)
+    path = picture_path(filename)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        # The stored copy may be unreferenced and old enough for `sweep`; bring it and its
+        # variants back inside the grace period until the new row commits
+        for name in [filename] + [variant_name(filename, size, ext) for size in SIZES for ext in FORMATS]:
+            try:
+                os.utime(picture_path(name))
+            except FileNotFoundError:
+                pass
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return filename
+
+def decodes(stream):
+    # Whether the upload is a JPEG or PNG, whatever its name says. Only the header is
+    # parsed, plus PNG chunk checksums (verify); decoding is left to the image pool.
+    from PIL import Image
+    try:
+        with Image.open(stream) as image:
+            if image.format not in ('JPEG', 'PNG') or not all(image.size):
+                return False
+            image.verify()
+        return True
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
+    finally:
+        stream.seek(0)
+
+class Picture:
+    # Form validator, alongside FileAllowed: checks the content rather than the extension
+    def __init__(self, message='That file is not a JPEG or PNG picture.'):
+        self.message = message
+
+    def __call__(self, form, field):
+        if field.data and not decodes(field.data.stream):
+            raise ValidationError(self.message)
+
+def schedule(session, filename):
+    # Processed after the surrounding transaction commits (see _submit_pending)
+    session.info.setdefault('pending_images', set()).add(filename)
+
+def avatar_url(owner, size='md', ext='jpg'):
+    # `owner` is a User or Patient; falls back to the stored upload until its variants exist
+    from app.assets import static_url # app.assets imports this module
+    if owner.image_sizes and size in owner.image_sizes.split(','):
+        return static_url(f'{FOLDER}/{variant_name(owner.image_file, size, ext)}')
+    return static_url(f'{FOLDER}/{owner.image_file}')
+
+def _flatten(image):
+    # JPEG has no alpha channel, so transparent PNGs go onto white
+    from PIL import Image
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def make_variants(filename):
+    # Pillow is only needed on the image pool, not to start the app
+    from PIL import Image, ImageOps
+    largest = max(SIZES.values())
+    with Image.open(picture_path(filename)) as source:
+        # For JPEGs, decode straight at 1/2, 1/4 or 1/8 scale from the DCT data
+        source.draft('RGB', (largest, largest))
+        image = _flatten(ImageOps.exif_transpose(source))
+
+    # Largest first, so each size is cut down from the previous one
+    for size, px in sorted(SIZES.items(), key=lambda item: -item[1]):
+        factor = min(image.size) // (px * 2)
+        if factor >= 2:
+            # Cheap integer box downscale; LANCZOS only does the last step
+            image = image.reduce(factor)
+        image = ImageOps.fit(image, (px, px), Image.LANCZOS)
+        for ext, options in FORMATS.items():
+            image.save(picture_path(variant_name(filename, size, ext)), **options)
+    return list(SIZES)
+
+def record_variants(filename, sizes):
+    value = ','.join(sizes)
+    for model in (User, Patient):
+        result = db.session.execute(update(model).where(model.image_file == filename).values(image_sizes=value))
+        if result.rowcount:
+            mark_changed(db.session, model.__tablename__)
+    db.session.commit()
+
+def variants_exist(filename):
+    return all(os.path.exists(picture_path(variant_name(filename, size, ext)))
+               for size in SIZES for ext in FORMATS)
+
+def process(filename):
+    # A re-upload of a stored picture already has its variants
+    sizes = list(SIZES) if variants_exist(filename) else make_variants(filename)
+    record_variants(filename, sizes)
+
+def referenced_files():
+    # Every stored file still in use: each referenced picture plus its variants
+    keep = {DEFAULT}
+    for model in (User, Patient):
+        for filename in db.session.scalars(db.select(model.image_file).distinct()):
+            keep.add(filename)
+            keep.update(variant_name(filename, size, ext) for size in SIZES for ext in FORMATS)
+    return keep
+
+def sweep(min_age=3600, dry_run=False):
+    # Deletes files no row refers to. Anything newer than `min_age` seconds is left
+    # alone, since its row may not have committed yet.
+    keep = referenced_files()
+    root = picture_path('')
+    cutoff = time.time() - min_age
+    removed, freed = [], 0
+    for directory, subdirs, files in os.walk(root, topdown=False):
+        for name in files:
+            path = os.path.join(directory, name)
+            filename = os.path.relpath(path, root).replace(os.sep, '/')
+            if filename in keep or os.path.getmtime(path) > cutoff:
+                continue
+            removed.append(filename)
+            freed += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        if directory != root and not dry_run and not os.listdir(directory):
+            os.rmdir(directory)
+    return removed, freed
+
+def _run(app, filename):
+    with app.app_context():
+        try:
+            process(filename)
+        except Exception:
+            # The page keeps showing the original upload
+            app.logger.exception('Could not resize %s', filename)
+
+def _reset_sizes(target, value, oldvalue, initiator):
+    # The recorded variants belong to the previous picture
+    if value != oldvalue:
+        target.image_sizes = None
+
+for _model in (User, Patient):
+    event.listen(_model.image_file, 'set', _reset_sizes)
+
+@event.listens_for(Session, 'after_commit')
+def _submit_pending(session):
+    filenames = session.info.pop('pending_images', None)
+    if not filenames:
+        return
+    app = current_app._get_current_object()
+    for filename in filenames:
+        if app.config['IMAGES_INLINE']:
+            _run(app, filename)
+        else:
+            app.extensions['images'].submit(_run, app, filename)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('pending_images', None)
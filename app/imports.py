@@ -0,0 +1,48 @@
+from app import db
+from app.events import mark_changed
+
+# Helpers shared by the patient and doctor spreadsheet importers. Both clean the
+# frame column-wise with pandas, reject bad rows by spreadsheet row number and insert
+# the rest in bulk.
+
+class ImportResult:
+    def __init__(self):
+        self.inserted = 0
+        # (spreadsheet row number, reason) for every row that was skipped
+        self.rejects = []
+
+    def reject(self, rows, reason):
+        self.rejects.extend((row, reason) for row in rows)
+
+    def reject_reasons(self, reason):
+        # `reason` holds the reject reason per row of the frame, NA where the row is fine
+        for text, rows in reason.dropna().groupby(reason.dropna()):
+            self.reject(row_numbers(rows.index), text)
+
+def check_columns(df, required):
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+def repeats(frame, reason, *keys):
+    # Rows repeating the key of an earlier row in the file. Only rows that passed the
+    # other checks count, so a rejected first copy doesn't take a good later one with it.
+    ok = reason.isna()
+    repeated = ok & False
+    for key in keys:
+        repeated |= frame[ok].duplicated(key).reindex(frame.index, fill_value=False)
+    return repeated
+
+def clean_text(series):
+    # Stripped strings, with blanks as NA
+    text = series.astype('string').str.strip()
+    return text.mask(text == '')
+
+def row_numbers(index):
+    # Spreadsheet row numbers: 1-based plus the header row
+    return (index + 2).tolist()
+
+def bulk_inserted(counter, count, *tables):
+    # Bulk inserts bypass the per-object events that keep these current
+    counter(db.session.connection(), count)
+    mark_changed(db.session, *tables)
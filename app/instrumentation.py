@@ -0,0 +1,175 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import partial
+from flask import g, request, has_request_context, request_started, request_finished, \
+    before_render_template, template_rendered
+from sqlalchemy import event
+from app import db
+
+# Per-endpoint request timings: how long each request took, how many SQL statements it
+# ran and how long they and the template rendering took, kept as histograms in process
+# memory and served in Prometheus text format at /metrics. Each gunicorn worker keeps
+# its own figures, so a scrape reports the worker that answered it.
+#
+# Statements slower than SLOW_QUERY_MS are logged with the route that ran them.
+
+# Histogram upper bounds
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (help, buckets)
+HISTOGRAMS = {
+    'hms_request_duration_seconds': ('Time to handle a request, until the response is returned.', SECONDS),
+    'hms_request_sql_queries': ('SQL statements executed per request.', QUERIES),
+    'hms_request_sql_seconds': ('Time spent executing SQL per request.', SECONDS),
+    'hms_request_render_seconds': ('Time spent rendering templates per request.', SECONDS),
+}
+
+# Truncate logged statements to this many characters
+STATEMENT_LOG_LENGTH = 500
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> endpoint -> Histogram
+        self._histograms = {name: {} for name in HISTOGRAMS}
+        # (endpoint, status) -> count
+        self._requests = defaultdict(int)
+
+    def record(self, endpoint, status, values):
+        # `values` maps histogram name -> observation for one request
+        with self._lock:
+            self._requests[(endpoint, status)] += 1
+            for name, value in values.items():
+                histogram = self._histograms[name].get(endpoint)
+                if histogram is None:
+                    histogram = self._histograms[name][endpoint] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def histogram(self, name, endpoint):
+        with self._lock:
+            return self._histograms[name].get(endpoint)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP hms_requests_total Requests handled, by endpoint and status code.')
+            lines.append('# TYPE hms_requests_total counter')
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'hms_requests_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+
+            for name, (help, buckets) in HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} histogram')
+                for endpoint, histogram in sorted(self._histograms[name].items()):
+                    label = f'endpoint="{_label(endpoint)}"'
+                    total = 0
+                    for bound, count in zip(list(buckets) + ['+Inf'], histogram.counts):
+                        total += count
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_cache_stats(stats):
+    # Figures from app/cache.py's page cache, in the same format
+    lines = []
+    for key, kind, help in [('hits', 'counter', 'Pages served from the rendered-page cache.'),
+                            ('misses', 'counter', 'Cacheable pages that had to be rendered.'),
+                            ('entries', 'gauge', 'Pages currently in the rendered-page cache.'),
+                            ('bytes', 'gauge', 'Size of the pages in the rendered-page cache.')]:
+        name = f"hms_page_cache_{key}{'_total' if kind == 'counter' else ''}"
+        lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}', f'{name} {stats[key]}']
+    return '\n'.join(lines) + '\n'
+
+def init_app(app):
+    # After database.init_app and replica.init_app, so every engine is hooked
+    app.extensions['instrumentation'] = Metrics()
+    with app.app_context():
+        engines = list(db.engines.values())
+    if 'replica' in app.extensions:
+        engines.append(app.extensions['replica'])
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', partial(_after_cursor_execute, app))
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql = 0
+        self.render = 0
+        # Start times of the templates being rendered; only the outermost one is timed
+        self.rendering = []
+
+def _current():
+    return g.get('_timings') if has_request_context() else None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements on one connection run one at a time; a failed one is simply overwritten
+    conn.info['query_started'] = time.perf_counter()
+
+def _after_cursor_execute(app, conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started']
+    timings = _current()
+    if timings is not None:
+        timings.queries += 1
+        timings.sql += elapsed
+
+    threshold = app.config['SLOW_QUERY_MS']
+    if threshold is not None and elapsed * 1000 >= threshold:
+        # Jobs and the image pool run outside any request
+        route = f'{request.method} {request.path} ({request.endpoint})' if has_request_context() else 'background'
+        app.logger.warning('Slow query (%.0f ms) in %s: %s', elapsed * 1000, route,
+                           ' '.join(statement.split())[:STATEMENT_LOG_LENGTH])
+
+def _request_started(sender, **extra):
+    # Reset per request: g outlives the request when the app context was pushed elsewhere
+    g._timings = RequestTimings()
+
+def _request_finished(sender, response, **extra):
+    timings = g.pop('_timings', None)
+    if timings is None:
+        return
+    endpoint = request.endpoint or 'unmatched'
+    sender.extensions['instrumentation'].record(endpoint, response.status_code, {
+        'hms_request_duration_seconds': time.perf_counter() - timings.started,
+        'hms_request_sql_queries': timings.queries,
+        'hms_request_sql_seconds': timings.sql,
+        'hms_request_render_seconds': timings.render,
+    })
+
+def _before_render(sender, template, context, **extra):
+    timings = _current()
+    if timings is not None:
+        timings.rendering.append(time.perf_counter())
+
+def _rendered(sender, template, context, **extra):
+    timings = _current()
+    if timings is not None and timings.rendering:
+        started = timings.rendering.pop()
+        if not timings.rendering:
+            timings.render += time.perf_counter() - started
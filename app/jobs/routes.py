@@ -0,0 +1,46 @@
+import os
+from flask import render_template, jsonify, abort, send_file, request, flash, redirect, url_for
+from app import db
+from app.jobs import jobs
+from app.models import Job
+from app.jobs.worker import orphaned, fail_orphan
+from flask_login import login_required, current_user
+
+def get_job_or_404(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        abort(404)
+    # Jobs are visible to whoever started them, and to admins
+    if job.user_id != current_user.id and current_user.role != 'admin':
+        abort(403)
+    if orphaned(job):
+        fail_orphan(job)
+        db.session.commit()
+    return job
+
+def job_started(job, message):
+    # API clients get the job id straight back; browsers go to the progress page
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(dict(job.to_dict(), status_url=url_for('jobs.job_status', job_id=job.id))), 202
+    flash(message, 'info')
+    return redirect(url_for('jobs.view_job', job_id=job.id))
+
+@jobs.route("/jobs/<job_id>")
+@login_required
+def view_job(job_id):
+    job = get_job_or_404(job_id)
+    return render_template('jobs/status.html', job=job, title='Job Status')
+
+@jobs.route("/api/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    return jsonify(get_job_or_404(job_id).to_dict())
+
+@jobs.route("/jobs/<job_id>/download")
+@login_required
+def download_job(job_id):
+    job = get_job_or_404(job_id)
+    # Results are deleted after JOB_RESULT_TTL
+    if job.status != 'finished' or not job.result_file or not os.path.isfile(job.result_file):
+        abort(404)
+    return send_file(job.result_file, as_attachment=True, download_name=job.download_name)
@@ -0,0 +1,133 @@
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app import db
+from app.models import Job
+
+# Imports and exports run on a small in-process thread pool instead of inside the
+# request, so a large spreadsheet no longer ties up a gunicorn worker (or hits its
+# timeout). State lives in the `job` table, so any worker can answer status polls.
+#
+# Each job records the process that owns it. One left queued or running by a process
+# that has since exited (a worker restart) is marked failed, so its status page stops
+# waiting. Finished exports are deleted after JOB_RESULT_TTL.
+
+_lock = threading.Lock()
+
+def init_app(app):
+    app.config.setdefault('JOBS_FOLDER', os.path.join(app.instance_path, 'jobs'))
+    os.makedirs(app.config['JOBS_FOLDER'], exist_ok=True)
+    # The pool is started by the first job, so CLI commands never create one
+    app.extensions['jobs'] = None
+
+def _pool(app):
+    with _lock:
+        if app.extensions['jobs'] is None:
+            app.extensions['jobs'] = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'],
+                                                        thread_name_prefix='job')
+            # First job in this process: clear up after the one that ran before it
+            fail_orphans()
+        return app.extensions['jobs']
+
+def owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def job_path(job_id, extension):
+    return os.path.join(current_app.config['JOBS_FOLDER'], f"{job_id}{extension}")
+
+def create_job(kind, user_id):
+    job = Job(id=uuid.uuid4().hex, kind=kind, user_id=user_id, owner=owner())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def enqueue(job, func, *args):
+    # `func(job, *args)` runs later in its own app context and DB session
+    app = current_app._get_current_object()
+    expire_files()
+    if app.config['JOBS_INLINE']:
+        _run(app, job.id, func, args)
+        # The job ran in its own session; reload what it recorded
+        db.session.expire(job)
+    else:
+        _pool(app).submit(_run, app, job.id, func, args)
+
+def report_progress(job, processed, total=None):
+    job.processed = processed
+    if total is not None:
+        job.total = total
+    db.session.commit()
+
+def record_errors(job, rejects):
+    job.errors = json.dumps([{'row': row, 'reason': reason} for row, reason in rejects])
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def orphaned(job):
+    if job.done:
+        return False
+    host, _, pid = (job.owner or '').rpartition(':')
+    # Processes on this host can be checked directly (os.kill would end one on Windows);
+    # anything else is given up on once it is JOB_ORPHAN_HOURS old
+    if host == socket.gethostname() and pid.isdigit() and os.name != 'nt':
+        return not _alive(int(pid))
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=current_app.config['JOB_ORPHAN_HOURS'])
+    return job.created_at < cutoff
+
+def fail_orphan(job):
+    job.status = 'failed'
+    job.message = 'Interrupted by a server restart. Please try again.'
+    job.finished_at = datetime.datetime.utcnow()
+
+def fail_orphans():
+    # Returns how many unfinished jobs had lost their process
+    jobs = [job for job in Job.query.filter(Job.status.in_(['queued', 'running'])) if orphaned(job)]
+    for job in jobs:
+        fail_orphan(job)
+    db.session.commit()
+    return len(jobs)
+
+def expire_files():
+    # Deletes export results (and uploads a crash left behind) older than JOB_RESULT_TTL
+    folder = current_app.config['JOBS_FOLDER']
+    cutoff = time.time() - current_app.config['JOB_RESULT_TTL']
+    removed = []
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed.append(name)
+        except FileNotFoundError:
+            pass # another worker got there first
+    return removed
+
+def _run(app, job_id, func, args):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        job.status = 'running'
+        db.session.commit()
+        try:
+            func(job, *args)
+            job.status = 'finished'
+        except Exception as e:
+            app.logger.exception('Job %s (%s) failed', job_id, job.kind)
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.status = 'failed'
+            job.message = str(e)[:200]
+        job.finished_at = datetime.datetime.utcnow()
+        db.session.commit()
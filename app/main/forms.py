@@ -4,13 +4,14 @@ from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired, Length, Email, ValidationError
 from flask_login import current_user
 from app.models import User
+from app.images import Picture
 
 class UpdateAccountForm(FlaskForm):
     username = StringField('Username',
                            validators=[DataRequired(), Length(min=2, max=20)])
     email = StringField('Email',
                         validators=[DataRequired(), Email()])
-    picture = FileField('Update Profile Picture', validators=[FileAllowed(['jpg', 'png'])])
+    picture = FileField('Update Profile Picture', validators=[FileAllowed(['jpg', 'png']), Picture()])
     submit = SubmitField('Update')
 
     def validate_username(self, username):
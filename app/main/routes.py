@@ -1,108 +1,118 @@
-from flask import render_template, request, flash, redirect, url_for, current_app, jsonify
+from flask import render_template, request, flash, redirect, url_for, current_app, jsonify, Response, g, abort
 from app.main import main
 from app.main.forms import UpdateAccountForm
 from app.models import User, Patient, Appointment, Doctor, Invoice
-from app import db
-from sqlalchemy import func
-import datetime
-import secrets
-import os
-from PIL import Image
+from app.dashboard import get_stats, api_payload, broker, DEPENDS_ON
+from app import db, instrumentation
+import json
+import queue
 from flask_login import login_required, current_user
+from app.replica import read_only
+from app.cache import cached, conditional, page_cache
 
 @main.route("/")
+@cached()
 def index():
     return render_template('landing.html', title='Home')
 
 @main.route("/home")
 @login_required
 def home():
-    # 1. New Patients (Last 7 days)
-    seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-    new_patients = Patient.query.filter(Patient.date_created >= seven_days_ago).count()
-    
-    # 2. Today's Appointments (Proxy for Operations/Activity)
-    today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = datetime.datetime.now().replace(hour=23, minute=59, second=59, microsecond=999999)
-    todays_appointments = Appointment.query.filter(
-        Appointment.date_time >= today_start,
-        Appointment.date_time <= today_end
-    ).count()
-
-    # 3. Active Doctors (Proxy for Satisfaction/Resources)
-    active_doctors = Doctor.query.count()
+    stats = get_stats()
 
     return render_template('home.html', title='Home',
-                           new_patients=new_patients,
-                           todays_appointments=todays_appointments,
-                           active_doctors=active_doctors)
+                           # 1. New Patients (Last 7 days)
+                           new_patients=stats['new_patients'],
+                           # 2. Today's Appointments (Proxy for Operations/Activity)
+                           todays_appointments=stats['todays_appointments'],
+                           # 3. Active Doctors (Proxy for Satisfaction/Resources)
+                           active_doctors=stats['doctors'])
 
 @main.route("/dashboard")
 @login_required
+@read_only
 def dashboard():
     if current_user.role not in ['admin', 'doctor', 'receptionist']:
         flash('Access denied.', 'danger')
         return redirect(url_for('main.home'))
         
-    # Counts
-    patient_count = Patient.query.count()
-    appointment_count = Appointment.query.count()
-    doctor_count = Doctor.query.count()
-    
-    # Revenue (Real Calculation)
-    revenue = db.session.query(func.sum(Invoice.amount)).scalar() or 0
-    revenue = int(revenue) 
+    # Counts, revenue and chart data (cached, see app/dashboard.py)
+    stats = get_stats()
     
     # Upcoming Appointments (Limit 5)
-    upcoming_appointments = Appointment.query.filter(
+    upcoming_appointments = Appointment.list_query().filter(
         Appointment.status == 'Scheduled'
     ).order_by(Appointment.date_time.asc()).limit(5).all()
 
-    # Chart Data: Appointments per day for last 7 days
-    today = datetime.datetime.now()
-    dates = []
-    counts = []
-    
-    for i in range(6, -1, -1):
-        date = today - datetime.timedelta(days=i)
-        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        count = Appointment.query.filter(
-            Appointment.date_time >= start_of_day,
-            Appointment.date_time <= end_of_day
-        ).count()
-        
-        dates.append(date.strftime('%a')) # Mon, Tue
-        counts.append(count)
-
     return render_template('dashboard.html', 
                            title='Dashboard',
-                           patient_count=patient_count,
-                           appointment_count=appointment_count,
-                           doctor_count=doctor_count,
-                           revenue=revenue,
+                           patient_count=stats['patients'],
+                           appointment_count=stats['appointments'],
+                           doctor_count=stats['doctors'],
+                           revenue=stats['revenue'],
                            upcoming_appointments=upcoming_appointments,
-                           chart_labels=dates,
-                           chart_data=counts)
+                           chart_labels=stats['chart_labels'],
+                           chart_data=stats['chart_data'])
 
 @main.route("/api/dashboard/stats")
 @login_required
+@read_only
+@conditional(*DEPENDS_ON)
 def dashboard_stats():
     if current_user.role not in ['admin', 'doctor', 'receptionist']:
         return jsonify({'error': 'Unauthorized'}), 401
         
-    patient_count = Patient.query.count()
-    appointment_count = Appointment.query.count()
-    doctor_count = Doctor.query.count()
-    revenue = db.session.query(func.sum(Invoice.amount)).scalar() or 0
-    
-    return jsonify({
-        'patients': patient_count,
-        'appointments': appointment_count,
-        'doctors': doctor_count,
-        'revenue': int(revenue)
-    })
+    # Polled every few seconds; unchanged figures are answered 304 by @conditional
+    return jsonify(api_payload(get_stats(g.table_versions)))
+
+@main.route("/api/dashboard/stream")
+@login_required
+@read_only
+def dashboard_stream():
+    if current_user.role not in ['admin', 'doctor', 'receptionist']:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    app = current_app._get_current_object()
+    heartbeat = app.config['DASHBOARD_STREAM_HEARTBEAT']
+
+    # Every open stream holds a worker thread; keep some for ordinary requests. A 503
+    # closes the EventSource and the page falls back to polling.
+    wakeup = broker.subscribe(app.config['DASHBOARD_STREAMS_PER_WORKER'])
+    if wakeup is None:
+        return jsonify({'error': 'Too many open streams'}), 503, {'Retry-After': '60'}
+
+    def events():
+        last = None
+        yield f"retry: {app.config['DASHBOARD_STREAM_RETRY_MS']}\n\n"
+        while True:
+            # A fresh app context per push so no DB connection is held while idle
+            with app.app_context():
+                payload = api_payload(get_stats())
+            if payload != last:
+                last = payload
+                yield f"data: {json.dumps(payload)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            # Woken by local commits; the heartbeat also picks up other workers' writes
+            try:
+                wakeup.get(timeout=heartbeat)
+            except queue.Empty:
+                pass
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Also runs when the client goes away before the first event
+    response.call_on_close(lambda: broker.unsubscribe(wakeup))
+    return response
+
+@main.route("/metrics")
+@login_required
+def metrics():
+    if current_user.role != 'admin':
+        abort(403)
+    # Prometheus text format; figures are per worker process (see app/instrumentation.py)
+    body = current_app.extensions['instrumentation'].render() + instrumentation.render_cache_stats(page_cache.stats())
+    return Response(body, mimetype='text/plain; version=0.0.4')
 
 from app.utils import save_picture
 
@@ -122,6 +132,4 @@ def account():
     elif request.method == 'GET':
         form.username.data = current_user.username
         form.email.data = current_user.email
-    image_file = url_for('static', filename='profile_pics/' + current_user.image_file)
-    return render_template('main/account.html', title='Account',
-                           image_file=image_file, form=form)
+    return render_template('main/account.html', title='Account', form=form)
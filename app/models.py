@@ -1,15 +1,31 @@
-from app import db, login_manager
+import json
+import string
+from app import db
 from flask_login import UserMixin
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import joinedload, validates
+from app import availability as availability_parser
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# SQLite's built-in lower() only folds A-Z
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def fold_case(text):
+    # Lowercase text the way the database's lower() does, so both sides of a comparison match
+    if db.engine.dialect.name == 'sqlite':
+        return text.translate(ASCII_LOWER)
+    return text.lower()
+
+# CURRENT_TIMESTAMP stores whole seconds ('2025-03-01 09:30:00'), but SQLite's DateTime binds
+# '.000000' on the end, so a stored value never compares equal to itself as a parameter and
+# keyset cursors on the column skip rows that share a timestamp. Bind in the stored format.
+Timestamp = db.DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), 'sqlite')
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    image_file = db.Column(db.String(20), nullable=False, default='default.jpg')
+    image_file = db.Column(db.String(64), nullable=False, default='default.jpg') # path under static/profile_pics
+    image_sizes = db.Column(db.String(20), nullable=True) # resized variants of image_file, e.g. 'sm,md,lg' (see app/images.py)
     password_hash = db.Column(db.String(128))
     role = db.Column(db.String(20), nullable=False, default='patient')
 
@@ -25,56 +41,170 @@ class User(db.Model, UserMixin):
         return f"User('{self.username}', '{self.email}', '{self.role}')"
 
 class Patient(db.Model):
+    __table_args__ = (
+        # Duplicate check in the bulk import
+        db.Index('ix_patient_name_contact', 'name', 'contact'),
+        # Patient list filtered by gender, in (date_created, id) order
+        db.Index('ix_patient_gender_date_created', 'gender', 'date_created'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True) # Optional link to User account
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True) # Optional link to User account
     name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer, nullable=True)
     gender = db.Column(db.String(10), nullable=True)
     contact = db.Column(db.String(15), nullable=True)
     address = db.Column(db.Text, nullable=True)
     medical_history = db.Column(db.Text, nullable=True)
-    image_file = db.Column(db.String(20), nullable=False, default='default.jpg')
-    date_created = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    image_file = db.Column(db.String(64), nullable=False, default='default.jpg') # path under static/profile_pics
+    image_sizes = db.Column(db.String(20), nullable=True) # resized variants of image_file, e.g. 'sm,md,lg' (see app/images.py)
+    date_created = db.Column(Timestamp, nullable=False, default=db.func.current_timestamp(), index=True)
 
     user = db.relationship('User', backref=db.backref('patient_profile', uselist=False))
 
+    @classmethod
+    def list_query(cls):
+        # Patient cards only read their own columns
+        return cls.query
+
+    @classmethod
+    def search_query(cls, prefix):
+        # Case-insensitive name prefix as a range seek on ix_patient_name_lower
+        prefix = fold_case(prefix)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        name = db.func.lower(cls.name)
+        return cls.query.filter(name >= prefix, name < upper).order_by(name, cls.id)
+
     def __repr__(self):
         return f"Patient('{self.name}', '{self.age}')"
 
+# Patient picker search (see Patient.search_query)
+db.Index('ix_patient_name_lower', db.func.lower(Patient.name))
+
 class Doctor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    specialization = db.Column(db.String(100), nullable=False)
-    availability = db.Column(db.String(200), nullable=True, default="Mon-Fri 9am-5pm")
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    specialization = db.Column(db.String(100), nullable=False, index=True)
+    availability = db.Column(db.String(200), nullable=True, default=availability_parser.DEFAULT)
+    # JSON [[weekday, start minute, end minute], ...] parsed from `availability`; kept in
+    # sync by the validator below (empty when the text can't be read)
+    availability_windows = db.Column(db.Text, nullable=True, default=availability_parser.dumps(availability_parser.parse(availability_parser.DEFAULT)))
     
     user = db.relationship('User', backref=db.backref('doctor_profile', uselist=False))
 
+    @validates('availability')
+    def validate_availability(self, key, value):
+        self.availability_windows = availability_parser.dumps(availability_parser.parse_or_none(value))
+        return value
+
+    @classmethod
+    def list_query(cls):
+        # Doctor cards show the linked user's name and avatar
+        return cls.query.options(joinedload(cls.user))
+
     def __repr__(self):
         return f"Doctor('{self.user.username}', '{self.specialization}')"
 
 class Appointment(db.Model):
+    __table_args__ = (
+        # Doctor / patient schedules and the status filter, each read in date order
+        db.Index('ix_appointment_doctor_id_date_time', 'doctor_id', 'date_time'),
+        db.Index('ix_appointment_patient_id_date_time', 'patient_id', 'date_time'),
+        db.Index('ix_appointment_status_date_time', 'status', 'date_time'),
+        # One scheduled appointment per doctor per slot (see app/appointment/slots.py)
+        db.Index('uq_appointment_doctor_slot', 'doctor_id', 'date_time', unique=True,
+                 sqlite_where=db.text("status = 'Scheduled'"), postgresql_where=db.text("status = 'Scheduled'")),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=True) # Optional link to existing patient
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
-    date_time = db.Column(db.DateTime, nullable=False)
+    # active_history keeps the previous value around so the counters can move day buckets
+    date_time = db.column_property(db.Column(db.DateTime, nullable=False, index=True), active_history=True)
     reason = db.Column(db.String(200), nullable=False)
     status = db.Column(db.String(20), nullable=False, default='Scheduled') # Scheduled, Completed, Cancelled
     
     patient = db.relationship('Patient', backref='appointments')
     doctor = db.relationship('Doctor', backref='appointments')
 
+    @classmethod
+    def list_query(cls):
+        # Appointment rows show the patient name and the doctor's username/specialization
+        return cls.query.options(
+            joinedload(cls.patient),
+            joinedload(cls.doctor).joinedload(Doctor.user)
+        )
+
     def __repr__(self):
         return f"Appointment('{self.date_time}', '{self.status}')"
 
 class Invoice(db.Model):
+    __table_args__ = (
+        # Invoice list filtered by patient or status, in (date_issued, id) order
+        db.Index('ix_invoice_patient_id_date_issued', 'patient_id', 'date_issued'),
+        db.Index('ix_invoice_status_date_issued', 'status', 'date_issued'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
     status = db.Column(db.String(20), nullable=False, default='Pending') # Pending, Paid
     description = db.Column(db.String(200), nullable=False)
-    date_issued = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    date_issued = db.Column(Timestamp, nullable=False, default=db.func.current_timestamp(), index=True)
     
     patient = db.relationship('Patient', backref='invoices')
 
+    @classmethod
+    def list_query(cls):
+        # Invoice rows show the patient name
+        return cls.query.options(joinedload(cls.patient))
+
     def __repr__(self):
         return f"Invoice('{self.id}', '{self.amount}', '{self.status}')"
+
+class StatsCounter(db.Model):
+    __tablename__ = 'stats_counters'
+    # 'patients', 'appointments', 'doctors', 'revenue' plus per-day buckets
+    # such as 'appointments:2025-01-31' (see app/counters.py)
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"StatsCounter('{self.name}', '{self.value}')"
+
+class Job(db.Model):
+    # Background import/export work (see app/jobs)
+    id = db.Column(db.String(32), primary_key=True) # uuid4 hex, safe to expose in URLs
+    kind = db.Column(db.String(40), nullable=False) # patient_import, doctor_import, patient_export, doctor_export
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, finished, failed
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    owner = db.Column(db.String(80), nullable=True) # host:pid of the process running it
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    message = db.Column(db.String(200), nullable=True)
+    errors = db.Column(db.Text, nullable=True) # JSON list of {"row": ..., "reason": ...}
+    result_file = db.Column(db.String(200), nullable=True)
+    download_name = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User')
+
+    @property
+    def done(self):
+        return self.status in ('finished', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'processed': self.processed,
+            'total': self.total,
+            'message': self.message,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'download': self.status == 'finished' and self.result_file is not None
+        }
+
+    def __repr__(self):
+        return f"Job('{self.id}', '{self.kind}', '{self.status}')"
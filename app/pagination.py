@@ -0,0 +1,102 @@
+import base64
+import datetime
+import json
+from flask import request, url_for, abort
+from sqlalchemy import and_, or_
+
+PER_PAGE = 24
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime.datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_values(token):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        abort(400)
+    if not isinstance(values, list):
+        abort(400)
+    return values
+
+def decode_cursor(token, columns):
+    values = decode_values(token)
+    try:
+        if len(values) != len(columns):
+            raise ValueError(token)
+        return [datetime.datetime.fromisoformat(v) if col.type.python_type is datetime.datetime else col.type.python_type(v)
+                for col, v in zip(columns, values)]
+    except (ValueError, TypeError):
+        abort(400)
+
+def after_condition(columns, values):
+    # Row-value comparison (c1, c2, ...) > (v1, v2, ...) spelled out so every backend
+    # can answer it with a range seek on the matching index.
+    clauses = []
+    for i, col in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, col > values[i]))
+    if len(columns) == 1:
+        return clauses[0]
+    # The OR alone makes SQLite walk the index from its start; the redundant bound on the
+    # leading column lets it seek straight to the cursor
+    return and_(columns[0] >= values[0], or_(*clauses))
+
+def parse_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        abort(400)
+
+def filter_date_range(query, column, date_from, date_to):
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        query = query.filter(column < date_to + datetime.timedelta(days=1))
+    return query
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    def url(self, cursor):
+        args = request.args.to_dict()
+        args.pop('cursor', None)
+        if cursor:
+            args['cursor'] = cursor
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        return self.url(self.next_cursor)
+
+    @property
+    def first_url(self):
+        return self.url(None)
+
+def keyset_paginate(query, columns, per_page=PER_PAGE):
+    # `columns` is the sort key in ascending order; the last one must be unique (the id)
+    # so that every row has a distinct position to resume from.
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        query = query.filter(after_condition(columns, decode_cursor(cursor, columns)))
+    rows = query.order_by(*columns).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([getattr(rows[-1], col.key) for col in columns])
+    return KeysetPage(rows, next_cursor, cursor)
@@ -0,0 +1,87 @@
+from sqlalchemy import insert, select
+from app import db, counters
+from app.imports import ImportResult, check_columns, clean_text, repeats, row_numbers, bulk_inserted
+from app.models import Patient
+
+# pandas is imported inside the functions that need it; this module is loaded with the
+# patient blueprint, long before (if ever) an import runs
+
+# Spreadsheet header -> Patient column
+COLUMNS = {
+    'Name': 'name',
+    'Age': 'age',
+    'Gender': 'gender',
+    'Contact': 'contact',
+    'Address': 'address',
+    'Medical History': 'medical_history'
+}
+REQUIRED_COLUMNS = list(COLUMNS)
+
+# Rows per duplicate lookup / INSERT batch (and per commit, so SQLite
+# writers elsewhere aren't locked out for the whole import)
+CHUNK_SIZE = 1000
+
+def read_frame(file):
+    # Keep contact numbers as text so Excel doesn't turn them into floats
+    import pandas as pd
+    return pd.read_excel(file, dtype={'Contact': str})
+
+def normalize(df):
+    # All cleaning is column-wise; returns the cleaned frame plus a Series holding the
+    # reject reason for each bad row (NA where the row is fine).
+    import pandas as pd
+    out = pd.DataFrame(index=df.index)
+    out['name'] = clean_text(df['Name'])
+    out['gender'] = clean_text(df['Gender']).str.title()
+    out['contact'] = clean_text(df['Contact']).str.replace(r'\.0$', '', regex=True)
+    out['address'] = clean_text(df['Address'])
+    out['medical_history'] = clean_text(df['Medical History']).fillna('')
+
+    age = pd.to_numeric(df['Age'], errors='coerce')
+    bad_age = df['Age'].notna() & (age.isna() | (age < 0) | (age > 150) | (age % 1 != 0))
+    out['age'] = age.where(~bad_age).astype('Int64')
+
+    reason = pd.Series(pd.NA, index=df.index, dtype='object')
+    reason = reason.mask(out['contact'].str.len() > 15, 'Contact number is too long')
+    reason = reason.mask(bad_age, 'Invalid age')
+    reason = reason.mask(out['name'].isna(), 'Missing name')
+    # Later copies of the same name + contact within the file
+    reason = reason.mask(repeats(out, reason, ['name', 'contact']), 'Duplicate row in file')
+    return out, reason
+
+def _records(chunk):
+    return chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+
+def import_patients(df, progress=None):
+    import pandas as pd
+    result = ImportResult()
+    check_columns(df, REQUIRED_COLUMNS)
+
+    patients, reason = normalize(df.reset_index(drop=True))
+    result.reject_reasons(reason)
+    patients = patients[reason.isna()]
+
+    for start in range(0, len(patients), CHUNK_SIZE):
+        chunk = patients.iloc[start:start + CHUNK_SIZE]
+
+        # One keyed lookup (ix_patient_name_contact) for the whole chunk
+        existing = set(db.session.execute(
+            select(Patient.name, Patient.contact).where(Patient.name.in_(chunk['name'].unique().tolist()))
+        ).all())
+        contact = chunk['contact'].astype(object).where(chunk['contact'].notna(), None)
+        keys = pd.Series(list(zip(chunk['name'], contact)), index=chunk.index)
+        duplicate = keys.map(existing.__contains__).astype(bool)
+        result.reject(row_numbers(chunk.index[duplicate]), 'Patient already exists')
+        chunk = chunk[~duplicate]
+
+        if len(chunk):
+            db.session.execute(insert(Patient), _records(chunk))
+            bulk_inserted(counters.patients_added, len(chunk), 'patient')
+            result.inserted += len(chunk)
+        db.session.commit()
+
+        if progress:
+            progress(min(start + CHUNK_SIZE, len(patients)), len(patients))
+
+    result.rejects.sort()
+    return result
@@ -1,22 +1,43 @@
-from flask import render_template, url_for, flash, redirect, request, abort, send_file
-import pandas as pd
-from io import BytesIO
-from app import db
+from flask import Response, stream_with_context, render_template, url_for, flash, redirect, request, abort, send_file, jsonify
+from app import db, identity
 from app.patient import patient
 from app.patient.forms import PatientForm
+from app.patient import tasks
+from app.patient import search
+from app.jobs.worker import create_job, enqueue, job_path
+from app.jobs.routes import job_started
+from app import exports
 from app.models import Patient
 from app.utils import save_picture
+from app.pagination import KeysetPage, keyset_paginate, parse_date, filter_date_range
 from flask_login import login_required, current_user
+from app.replica import read_only
+from app.cache import cached, conditional
 
 @patient.route("/patients")
 @login_required
+@read_only
 def list_patients():
     if current_user.role in ['admin', 'doctor', 'receptionist']:
-        patients = Patient.query.all()
-        return render_template('patient/list.html', patients=patients)
+        q = request.args.get('q', '').strip()
+        if q:
+            # Full-text matches, best first (see app/patient/search.py)
+            cursor = request.args.get('cursor') or None
+            found, next_cursor = search.search_page(q, cursor)
+            page = KeysetPage(found, next_cursor, cursor)
+        else:
+            query = Patient.list_query()
+            gender = request.args.get('gender')
+            if gender:
+                query = query.filter(Patient.gender == gender)
+            query = filter_date_range(query, Patient.date_created, parse_date('date_from'), parse_date('date_to'))
+            # Newest last, like the id order; date_created leads so a date filter and the
+            # cursor seek the same index
+            page = keyset_paginate(query, [Patient.date_created, Patient.id])
+        return render_template('patient/list.html', patients=page.items, page=page, q=q)
     else:
         # Patient redirected to their own profile
-        patient_record = Patient.query.filter_by(user_id=current_user.id).first()
+        patient_record = identity.current().patient
         if patient_record:
             return redirect(url_for('patient.view_patient', patient_id=patient_record.id))
         else:
@@ -25,6 +46,9 @@ def list_patients():
 
 @patient.route("/patient/<int:patient_id>")
 @login_required
+@read_only
+@conditional('patient', 'appointment', 'invoice', 'doctor', 'user')
+@cached('patient', 'appointment', 'invoice', 'doctor', 'user')
 def view_patient(patient_id):
     patient_record = Patient.query.get_or_404(patient_id)
     # Authorization check
@@ -94,17 +118,10 @@ def download_patient_template():
     if current_user.role not in ['admin', 'doctor', 'receptionist']:
         abort(403)
     
-    # Create a DataFrame with the required columns
+    # Header row only; users fill it in and upload it to the import
     columns = ['Name', 'Age', 'Gender', 'Contact', 'Address', 'Medical History']
-    df = pd.DataFrame(columns=columns)
-    
-    # Create a BytesIO buffer to hold the Excel file
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Patients_Template')
-        
-    output.seek(0)
-    
+    output = exports.template_xlsx('Patients_Template', columns)
+
     return send_file(output, as_attachment=True, download_name="patient_template.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 
@@ -125,39 +142,12 @@ def import_patients():
         return redirect(url_for('patient.list_patients'))
         
     if file and file.filename.endswith('.xlsx'):
-        try:
-            df = pd.read_excel(file)
-            
-            # Check if required columns exist
-            required_columns = ['Name', 'Age', 'Gender', 'Contact', 'Address', 'Medical History']
-            if not all(col in df.columns for col in required_columns):
-                flash('Invalid file format. Please use the template.', 'danger')
-                return redirect(url_for('patient.list_patients'))
-            
-            count = 0
-            for index, row in df.iterrows():
-                # Check for potentially duplicate patients (simple check by name and contact)
-                # In real world, might need better logic
-                existing_patient = Patient.query.filter_by(name=row['Name'], contact=str(row['Contact'])).first()
-                if existing_patient:
-                    continue # Skip duplicates
-                
-                patient = Patient(
-                    name=row['Name'],
-                    age=row['Age'],
-                    gender=row['Gender'],
-                    contact=str(row['Contact']),
-                    address=row['Address'],
-                    medical_history=row.get('Medical History', '')
-                )
-                db.session.add(patient)
-                count += 1
-                
-            db.session.commit()
-            flash(f'{count} patients imported successfully!', 'success')
-            
-        except Exception as e:
-            flash(f'Error importing file: {str(e)}', 'danger')
+        # Parse and insert in the background; the request only stores the upload
+        job = create_job('patient_import', current_user.id)
+        path = job_path(job.id, '.xlsx')
+        file.save(path)
+        enqueue(job, tasks.run_import, path)
+        return job_started(job, 'Import started. This page updates as rows are processed.')
     else:
         flash('Invalid file type. Please upload an Excel file (.xlsx)', 'danger')
         
@@ -166,30 +156,31 @@ def import_patients():
 
 @patient.route("/patient/export")
 @login_required
+@read_only
 def export_patients():
     if current_user.role not in ['admin', 'doctor', 'receptionist']:
         abort(403)
         
-    patients = Patient.query.all()
-    
-    data = []
-    for patient in patients:
-        data.append({
-            'Name': patient.name,
-            'Age': patient.age,
-            'Gender': patient.gender,
-            'Contact': patient.contact,
-            'Address': patient.address,
-            'Medical History': patient.medical_history
-        })
-        
-    df = pd.DataFrame(data)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Patients')
-        
-    output.seek(0)
-    
-    return send_file(output, as_attachment=True, download_name="patients_export.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    if request.args.get('format') == 'csv':
+        # CSV needs no workbook, so it goes out in chunks as the rows are read
+        rows = exports.csv_stream(tasks.EXPORT_COLUMNS, tasks.export_statement())
+        return Response(stream_with_context(rows), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment; filename=patients_export.csv'})
 
+    job = create_job('patient_export', current_user.id)
+    enqueue(job, tasks.run_export)
+    return job_started(job, 'Export started. The download will be ready here shortly.')
+
+@patient.route("/api/patients/search")
+@login_required
+@read_only
+def search_patients():
+    # Typeahead for the patient pickers on the appointment and invoice forms
+    if current_user.role not in ['admin', 'doctor', 'receptionist']:
+        abort(403)
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify(patients=[])
+    limit = min(request.args.get('limit', 20, type=int), 50)
+    found = Patient.search_query(q).with_entities(Patient.id, Patient.name, Patient.contact).limit(limit)
+    return jsonify(patients=[dict(id=id, name=name, contact=contact) for id, name, contact in found])
@@ -0,0 +1,132 @@
+import re
+from sqlalchemy import DDL, event, text
+from flask import abort
+from app import db
+from app.models import Patient, fold_case
+from app.pagination import after_condition, encode_cursor, decode_values
+
+# Full-text index over the patient record. On SQLite it is an FTS5 table that reads
+# its text from `patient` (external content) and is kept current by triggers, so the
+# bulk importer's Core inserts are covered too. Rebuilding a table in a batch
+# migration drops its triggers; run `flask patients reindex` after such a migration.
+
+TABLE = 'patient_fts'
+COLUMNS = ['name', 'contact', 'address', 'medical_history']
+# bm25 weights, in COLUMNS order: a hit in the name outranks one in the notes
+WEIGHTS = [10.0, 5.0, 1.0, 1.0]
+LIMIT = 50
+# bm25 scores every match it orders: a word shared by a large part of the table (a
+# common diagnosis) would take most of a second on 1M patients. Queries with up to
+# RANKED matches are ranked; broader ones list their matches newest first, which
+# FTS5 reads straight off its index. Pages resume from (rank, rowid) or rowid.
+# `python -m benchmarks.search` times both on a seeded table.
+RANKED = 1000
+
+def _values(prefix):
+    return ', '.join(f'{prefix}.{col}' for col in COLUMNS)
+
+CREATE = [
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5({', '.join(COLUMNS)}, content='patient', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', 'bm25({', '.join(map(str, WEIGHTS))})')",
+    f"CREATE TRIGGER {TABLE}_ai AFTER INSERT ON patient BEGIN "
+    f"INSERT INTO {TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')}); END",
+    f"CREATE TRIGGER {TABLE}_ad AFTER DELETE ON patient BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {_values('old')}); END",
+    # Picture and account changes don't touch the indexed text
+    f"CREATE TRIGGER {TABLE}_au AFTER UPDATE OF {', '.join(COLUMNS)} ON patient BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {_values('old')}); "
+    f"INSERT INTO {TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')}); END",
+]
+
+for statement in CREATE:
+    event.listen(Patient.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Patient.__table__, 'before_drop', DDL(f'DROP TABLE IF EXISTS {TABLE}').execute_if(dialect='sqlite'))
+
+def match_expression(query):
+    # Every word must appear, each as a prefix ("jo smi" finds "John Smith"). Words are
+    # quoted so FTS5 operators in the input are taken literally. Single letters match
+    # whole words only; there's no prefix index that short.
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in words) or None
+
+def search(query, limit=LIMIT):
+    # First page only, best matches first
+    return search_page(query, None, limit)[0]
+
+def _position(cursor):
+    # Cursors name their order: ['rank', rank, rowid] or ['rowid', rowid]
+    values = decode_values(cursor)
+    if values[:1] == ['rank'] and len(values) == 3 or values[:1] == ['rowid'] and len(values) == 2:
+        if all(isinstance(v, (int, float)) for v in values[1:]):
+            return values
+    abort(400)
+
+def search_page(query, cursor=None, limit=LIMIT):
+    # (patients, next cursor) for one page of matches
+    if db.engine.dialect.name != 'sqlite':
+        return _name_page(query, cursor, limit)
+    expression = match_expression(query)
+    if not expression:
+        return [], None
+
+    if cursor:
+        position = _position(cursor)
+        rows = _rows(expression, position, limit)
+    else:
+        # Newest RANKED + 1 matches: says whether to rank, and is the first page if not
+        rows = _rows(expression, ['rowid'], RANKED)
+        position = ['rowid']
+        if len(rows) <= RANKED:
+            position = ['rank']
+            rows = _rows(expression, position, limit)
+        rows = rows[:limit + 1]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(['rank', last.rank, last.rowid] if position[0] == 'rank' else ['rowid', last.rowid])
+    ids = [row[0] for row in rows]
+    patients = {p.id: p for p in Patient.list_query().filter(Patient.id.in_(ids))}
+    return [patients[i] for i in ids if i in patients], next_cursor
+
+def _rows(expression, position, limit):
+    # limit + 1 matches after `position`, in its order
+    params = dict(q=expression, limit=limit + 1)
+    if position[0] == 'rank':
+        after = ''
+        if len(position) == 3:
+            after = ' AND (rank > :rank OR (rank = :rank AND rowid > :id))'
+            params.update(rank=position[1], id=position[2])
+        sql = f'SELECT rowid, rank FROM {TABLE} WHERE {TABLE} MATCH :q{after} ORDER BY rank, rowid LIMIT :limit'
+    else:
+        after = ''
+        if len(position) == 2:
+            after = ' AND rowid < :id'
+            params.update(id=position[1])
+        sql = f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :q{after} ORDER BY rowid DESC LIMIT :limit'
+    return db.session.execute(text(sql), params).all()
+
+def _name_page(query, cursor, limit):
+    # Without FTS5: name prefix matches in name order, resumed from (lower(name), id)
+    if not query.strip():
+        return [], None
+    found = Patient.search_query(query)
+    if cursor:
+        values = decode_values(cursor)
+        if len(values) != 2:
+            abort(400)
+        found = found.filter(after_condition([db.func.lower(Patient.name), Patient.id], values))
+    rows = found.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([fold_case(rows[-1].name), rows[-1].id])
+    return rows, next_cursor
+
+def rebuild():
+    # Re-read every row of `patient` into the index
+    db.session.execute(text(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+    return db.session.scalar(text(f'SELECT count(*) FROM {TABLE}'))
@@ -0,0 +1,35 @@
+import os
+from app import exports
+from app.jobs.worker import job_path, report_progress, record_errors
+from app.models import Patient
+from app.patient import importer
+
+def run_import(job, path):
+    try:
+        df = importer.read_frame(path)
+    finally:
+        os.remove(path)
+    if not all(col in df.columns for col in importer.REQUIRED_COLUMNS):
+        raise ValueError('Invalid file format. Please use the template.')
+
+    report_progress(job, 0, len(df))
+    result = importer.import_patients(df, progress=lambda done, total: report_progress(job, done))
+    job.processed = len(df)
+    record_errors(job, result.rejects)
+    job.message = f'{result.inserted} patients imported successfully!'
+
+# Spreadsheet header -> column, in template order
+EXPORT_COLUMNS = [(header, getattr(Patient, attr)) for header, attr in importer.COLUMNS.items()]
+
+def export_statement():
+    return exports.export_statement(EXPORT_COLUMNS).order_by(Patient.id)
+
+def run_export(job):
+    statement = export_statement()
+    report_progress(job, 0, exports.count_rows(statement))
+
+    path = job_path(job.id, '.xlsx')
+    job.processed = exports.write_xlsx(path, 'Patients', EXPORT_COLUMNS, statement)
+    job.result_file = path
+    job.download_name = 'patients_export.xlsx'
+    job.message = f'{job.processed} patients exported.'
@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+from app.events import models_committed
+
+# Optional read replica. When REPLICA_DATABASE_URI is set, SELECTs issued
+# by views marked @read_only go to it; everything else, including any write those
+# views make, stays on the primary. A browser that wrote something is kept on the
+# primary for REPLICA_STICKY_SECONDS so it doesn't read back data older than its own
+# write while the replica catches up.
+
+SAFE_METHODS = frozenset(['GET', 'HEAD'])
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and isinstance(clause, Select) and self._use_replica():
+            return current_app.extensions['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        if not (has_app_context() and g.get('read_only')) or 'replica' not in current_app.extensions:
+            return False
+        # Read our own uncommitted writes from where they are
+        return not (self._flushing or self.new or self.dirty or self.deleted or self.info.get('changed_tables'))
+
+def wrote_recently():
+    written = session.get('_db_written')
+    return written is not None and time.time() - written < current_app.config['REPLICA_STICKY_SECONDS']
+
+def read_only(f):
+    # Marks a view whose queries may be answered by the replica
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.method in SAFE_METHODS and not wrote_recently():
+            g.read_only = True
+        return f(*args, **kwargs)
+    return decorated
+
+@contextmanager
+def primary():
+    # Queries inside go to the primary even in a @read_only view, e.g. to fill a cache
+    # that must not hold data older than the writes that invalidated it
+    read_only = g.pop('read_only', None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if read_only:
+            g.read_only = read_only
+
+def _clear_read_only(exc):
+    g.pop('read_only', None)
+
+def init_app(app):
+    if app.config.get('REPLICA_DATABASE_URI'):
+        from app.database import make_engine
+        app.extensions['replica'] = make_engine(app, app.config['REPLICA_DATABASE_URI'])
+    # g outlives the request when the app context was pushed by someone else (tests, CLI)
+    app.teardown_request(_clear_read_only)
+
+@models_committed.connect
+def _remember_write(sender, tables):
+    if has_request_context():
+        session['_db_written'] = time.time()
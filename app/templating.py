@@ -0,0 +1,31 @@
+import os
+from jinja2 import FileSystemBytecodeCache
+
+# Compiled templates are kept on disk (keyed by name and source checksum, so edits are
+# picked up), and each gunicorn worker loads every template once the app is up (the
+# post_worker_init hook in gunicorn.conf.py). A restarted worker then reads bytecode
+# instead of parsing and compiling base.html and the list pages on its first
+# requests. CLI commands and tests never render most pages, so create_app() itself
+# doesn't load them; `flask templates compile` fills the cache ahead of a deploy.
+
+def cache_dir(app):
+    return app.config['TEMPLATE_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+
+def init_app(app):
+    directory = cache_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+def warm_up(app):
+    # For servers about to take requests; returns how many templates were loaded
+    if not app.config['PRECOMPILE_TEMPLATES'] or app.testing:
+        return 0
+    return precompile(app)
+
+def precompile(app):
+    # Loads every template into the environment's cache (compiling and storing the
+    # bytecode of any that changed); returns how many there are
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
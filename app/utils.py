@@ -1,18 +1,7 @@
-
-import os
-import secrets
-from PIL import Image
-from flask import current_app
+from app import db, images
 
 def save_picture(form_picture):
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(form_picture.filename)
-    picture_fn = random_hex + f_ext
-    picture_path = os.path.join(current_app.root_path, 'static/profile_pics', picture_fn)
-
-    output_size = (125, 125)
-    i = Image.open(form_picture)
-    i.thumbnail(output_size)
-    i.save(picture_path)
-
+    # Stored under its content hash; resizing happens on the image pool once this commits
+    picture_fn = images.store_upload(form_picture)
+    images.schedule(db.session, picture_fn)
     return picture_fn
@@ -0,0 +1,130 @@
+"""Cold vs warm render times of the list pages.
+
+    python -m benchmarks.render_lists [--repeat 20]
+
+Each scenario builds a fresh app, as a restarted gunicorn worker would, against a
+seeded throwaway SQLite database:
+
+  cold        empty bytecode cache, templates compiled on first use
+  bytecode    bytecode cache populated by an earlier run, loaded on first use
+  precompiled bytecode cache populated and every template loaded before the first
+              request, as gunicorn workers do (PRECOMPILE_TEMPLATES, the default)
+  warm        the same page again in a worker that has already served it (median)
+"""
+import argparse
+import datetime
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from flask import url_for
+from app import create_app, db, assets, templating
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment, Invoice
+
+PAGES = ['/patients', '/appointments', '/doctors', '/invoices', '/dashboard']
+
+def make_config(workdir, cache_dir, precompile):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        WTF_CSRF_ENABLED = False
+        # Measure rendering, not the rendered-page cache
+        PAGE_CACHE_MAX_BYTES = 0
+        TEMPLATE_CACHE_DIR = cache_dir
+        PRECOMPILE_TEMPLATES = precompile
+    return BenchConfig
+
+def seed():
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.set_password('password')
+    db.session.add(admin)
+    doctors = []
+    for i in range(20):
+        user = User(username=f'doctor{i}', email=f'doctor{i}@example.com', role='doctor',
+                    password_hash=admin.password_hash)
+        doctors.append(Doctor(user=user, specialization='General'))
+    patients = [Patient(name=f'Patient {i}', age=30 + i % 50, contact=f'555{i:07d}') for i in range(200)]
+    db.session.add_all(doctors + patients)
+    start = datetime.datetime(2025, 3, 3, 9, 0)
+    for i in range(500):
+        db.session.add(Appointment(doctor=doctors[i % 20], patient=patients[i % 200], reason='Checkup',
+                                   date_time=start + datetime.timedelta(minutes=30 * i)))
+    for i in range(200):
+        db.session.add(Invoice(patient=patients[i], amount=50, description='Consultation'))
+    db.session.commit()
+
+def ms(seconds):
+    return f'{seconds * 1000:8.1f}'
+
+def first_requests(config):
+    # Startup plus the first request for every page in a new app
+    started = time.perf_counter()
+    app = create_app(config)
+    templating.warm_up(app)
+    startup = time.perf_counter() - started
+    with app.app_context():
+        client = app.test_client()
+        client.post('/login', data=dict(login_id='admin', password='password'))
+        times = {}
+        for page in PAGES:
+            started = time.perf_counter()
+            assert client.get(page).status_code == 200, page
+            times[page] = time.perf_counter() - started
+    return app, startup, times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per page for the warm median.')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, 'jinja_cache')
+    try:
+        app = create_app(make_config(workdir, cache_dir, False))
+        with app.app_context():
+            db.create_all()
+            seed()
+        shutil.rmtree(cache_dir)
+
+        results = {}
+        results['cold'] = first_requests(make_config(workdir, cache_dir, False))
+        results['bytecode'] = first_requests(make_config(workdir, cache_dir, False))
+        results['precompiled'] = first_requests(make_config(workdir, cache_dir, True))
+
+        app = results['precompiled'][0]
+        warm = {}
+        with app.app_context():
+            client = app.test_client()
+            client.post('/login', data=dict(login_id='admin', password='password'))
+            for page in PAGES:
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    client.get(page)
+                    samples.append(time.perf_counter() - started)
+                warm[page] = statistics.median(samples)
+
+        print(f"{'ms':<14}" + ''.join(f'{name:>12}' for name in ['cold', 'bytecode', 'precompiled', 'warm']))
+        print(f"{'startup':<14}" + ''.join(f'    {ms(results[name][1])}' for name in ['cold', 'bytecode', 'precompiled'])
+              + f"    {'':>8}")
+        for page in PAGES:
+            print(f'{page:<14}' + ''.join(f'    {ms(results[name][2][page])}' for name in ['cold', 'bytecode', 'precompiled'])
+                  + f'    {ms(warm[page])}')
+
+        # Static URL building on its own, per avatar row
+        with app.test_request_context():
+            filename = 'profile_pics/default.jpg'
+            for label, build in [('url_for', lambda: url_for('static', filename=filename)),
+                                 ('static_url', lambda: assets.static_url(filename))]:
+                started = time.perf_counter()
+                for _ in range(10000):
+                    build()
+                print(f'{label:<14}{(time.perf_counter() - started) * 100:8.2f} us/call')
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    main()
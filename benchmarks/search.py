@@ -0,0 +1,74 @@
+"""Patient full-text search times on a large table.
+
+    python -m benchmarks.search [--patients 1000000] [--repeat 5]
+
+Seeds a throwaway SQLite database through the bulk insert path (the FTS5 triggers keep
+the index current) and times the first and second page of a few queries, from rare
+names to words found in a large share of the table.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from sqlalchemy import insert
+from app import create_app, db
+from app.config import Config
+from app.models import Patient
+from app.patient import search
+
+FIRST = ['John', 'Mary', 'Ahmed', 'Li', 'Sofia', 'Ivan', 'Ana', 'Kwame']
+LAST = ['Smith', 'Jones', 'Okafor', 'Garcia', 'Chen', 'Novak']
+HISTORY = ['Hypertension', 'Type 2 diabetes', 'Asthma', 'Migraine', 'Fractured wrist', '']
+QUERIES = ['okafor 12345', 'garcia', 'smith', 'hypertension', 'jo smi']
+
+def make_config(workdir):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        PRECOMPILE_TEMPLATES = False
+        # Seeding is slow by design; don't log it
+        SLOW_QUERY_MS = None
+    return BenchConfig
+
+def seed(count):
+    rng = random.Random(1)
+    for start in range(0, count, 50000):
+        db.session.execute(insert(Patient), [dict(
+            name=f'{rng.choice(FIRST)} {rng.choice(LAST)} {i}', contact=f'555{i:07d}', address=f'{i} Main St',
+            medical_history=rng.choice(HISTORY)) for i in range(start, min(start + 50000, count))])
+        db.session.commit()
+
+def timed(query, cursor=None):
+    started = time.perf_counter()
+    found, next_cursor = search.search_page(query, cursor)
+    return time.perf_counter() - started, next_cursor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query for the median.')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        app = create_app(make_config(workdir))
+        with app.app_context():
+            db.create_all()
+            seed(args.patients)
+            print(f"{'query':<16}{'page 1 ms':>10}{'page 2 ms':>10}")
+            for query in QUERIES:
+                first, second = [], []
+                for _ in range(args.repeat):
+                    elapsed, cursor = timed(query)
+                    first.append(elapsed)
+                    if cursor:
+                        second.append(timed(query, cursor)[0])
+                page2 = f'{statistics.median(second) * 1000:10.1f}' if second else f"{'-':>10}"
+                print(f'{query:<16}{statistics.median(first) * 1000:10.1f}{page2}')
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    main()
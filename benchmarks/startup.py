@@ -0,0 +1,71 @@
+"""Process startup time: importing the app and running create_app().
+
+    python -m benchmarks.startup [--budget-ms 1200] [--top 15]
+
+Starts a fresh interpreter under -X importtime, prints the slowest packages to import
+and exits with status 1 if startup goes over the budget or loads one of the heavy
+libraries that only the import/export and image code paths need.
+tests/test_startup.py checks the heavy libraries only; timings vary too much between
+machines for the test suite.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily by the code that uses them (see app/exports.py)
+HEAVY = ['pandas', 'numpy', 'PIL.Image', 'xlsxwriter']
+
+# Milliseconds from the first app import until create_app() returns
+BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 1200))
+
+CHILD = f"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+from app.config import Config
+
+class StartupConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+create_app(StartupConfig)
+print(json.dumps({{'ms': (time.perf_counter() - started) * 1000,
+                  'heavy': [name for name in {HEAVY!r} if name in sys.modules]}}))
+"""
+
+def measure():
+    # Returns (startup ms, heavy modules loaded, [(cumulative ms, package)] for every
+    # top-level package imported, at whatever depth it was first pulled in)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        name = fields[2].strip()
+        if fields[1].strip().isdigit() and '.' not in name:
+            imports.append((int(fields[1]) / 1000, name))
+    imports.sort(reverse=True)
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    return summary['ms'], summary['heavy'], imports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=int, default=BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15, help='How many of the slowest packages to list.')
+    args = parser.parse_args()
+
+    ms, heavy, imports = measure()
+    for cumulative, name in imports[:args.top]:
+        print(f'{cumulative:8.1f} ms  {name}')
+    print(f'startup {ms:.1f} ms (budget {args.budget_ms} ms)')
+    if heavy:
+        print(f"loaded at startup: {', '.join(heavy)}")
+    sys.exit(1 if heavy or ms > args.budget_ms else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import os
+
+# Every open dashboard keeps a /api/dashboard/stream response alive, so the default
+# sync worker (one request per process) would be exhausted by a handful of tabs.
+# gthread parks idle streams on threads, and DASHBOARD_STREAMS_PER_WORKER (default 16)
+# keeps the other half of them for ordinary requests; dashboards past that poll
+# instead. Set GUNICORN_WORKER_CLASS=gevent (and `pip install gevent`) to hold
+# thousands of streams per worker; the cap is then raised to match.
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Read by app/config.py in the workers
+if worker_class == 'gevent':
+    os.environ.setdefault('DASHBOARD_STREAMS_PER_WORKER', str(worker_connections // 2))
+else:
+    os.environ.setdefault('DASHBOARD_STREAMS_PER_WORKER', str(max(1, threads // 2)))
+timeout = 60
+keepalive = 5
+
+def post_worker_init(worker):
+    # Load every template before the worker's first request (see app/templating.py)
+    from app import templating
+    templating.warm_up(worker.wsgi)
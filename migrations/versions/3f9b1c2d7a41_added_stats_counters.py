@@ -0,0 +1,38 @@
+"""Added stats_counters table
+
+Revision ID: 3f9b1c2d7a41
+Revises: 6a43b6286083
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9b1c2d7a41'
+down_revision = '6a43b6286083'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stats_counters',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Seed from the existing rows (same figures as `flask stats rebuild`)
+    op.execute("INSERT INTO stats_counters (name, value) SELECT 'patients', COUNT(*) FROM patient")
+    op.execute("INSERT INTO stats_counters (name, value) SELECT 'appointments', COUNT(*) FROM appointment")
+    op.execute("INSERT INTO stats_counters (name, value) SELECT 'doctors', COUNT(*) FROM doctor")
+    op.execute("INSERT INTO stats_counters (name, value) SELECT 'revenue', COALESCE(SUM(amount), 0) FROM invoice")
+    op.execute("INSERT INTO stats_counters (name, value) "
+               "SELECT 'appointments:' || date(date_time), COUNT(*) FROM appointment GROUP BY date(date_time)")
+    op.execute("INSERT INTO stats_counters (name, value) "
+               "SELECT 'patients:' || date(date_created), COUNT(*) FROM patient GROUP BY date(date_created)")
+
+
+def downgrade():
+    op.drop_table('stats_counters')
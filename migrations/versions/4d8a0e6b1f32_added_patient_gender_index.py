@@ -0,0 +1,26 @@
+"""Added patient gender index
+
+Revision ID: 4d8a0e6b1f32
+Revises: 9e4d2b7c6a15
+Create Date: 2026-10-19 09:14:27.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a0e6b1f32'
+down_revision = '9e4d2b7c6a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_patient_gender'), ['gender'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_patient_gender'))
@@ -0,0 +1,26 @@
+"""Added job owner
+
+Revision ID: 7b1e93c4d5a8
+Revises: 4d8a0e6b1f32
+Create Date: 2026-10-19 10:02:51.338170
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b1e93c4d5a8'
+down_revision = '4d8a0e6b1f32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(length=80), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('owner')
@@ -0,0 +1,30 @@
+"""Added unique slot index for scheduled appointments
+
+Revision ID: 7d3e5a1f9b20
+Revises: 0b6f2d9e4c17
+Create Date: 2026-10-18 17:12:03.518274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3e5a1f9b20'
+down_revision = '0b6f2d9e4c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if a doctor already has two scheduled appointments at the same time;
+    # cancel or move one of them first.
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index('uq_appointment_doctor_slot', ['doctor_id', 'date_time'], unique=True,
+                              sqlite_where=sa.text("status = 'Scheduled'"),
+                              postgresql_where=sa.text("status = 'Scheduled'"))
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('uq_appointment_doctor_slot')
@@ -0,0 +1,46 @@
+"""Added full-text patient search index
+
+Revision ID: 9e4d2b7c6a15
+Revises: f3b7c1e9a2d4
+Create Date: 2026-10-18 19:48:10.603512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4d2b7c6a15'
+down_revision = 'f3b7c1e9a2d4'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'name, contact, address, medical_history'
+OLD = 'old.name, old.contact, old.address, old.medical_history'
+NEW = 'new.name, new.contact, new.address, new.medical_history'
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases fall back to the name prefix search
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(f"CREATE VIRTUAL TABLE patient_fts USING fts5({COLUMNS}, content='patient', content_rowid='id', "
+               "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    op.execute("INSERT INTO patient_fts(patient_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0, 1.0)')")
+    op.execute(f"CREATE TRIGGER patient_fts_ai AFTER INSERT ON patient BEGIN "
+               f"INSERT INTO patient_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+    op.execute(f"CREATE TRIGGER patient_fts_ad AFTER DELETE ON patient BEGIN "
+               f"INSERT INTO patient_fts(patient_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END")
+    op.execute(f"CREATE TRIGGER patient_fts_au AFTER UPDATE OF {COLUMNS} ON patient BEGIN "
+               f"INSERT INTO patient_fts(patient_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+               f"INSERT INTO patient_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+    # Index the existing rows
+    op.execute("INSERT INTO patient_fts(patient_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('patient_fts_ai', 'patient_fts_ad', 'patient_fts_au'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS patient_fts')
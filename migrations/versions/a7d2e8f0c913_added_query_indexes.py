@@ -0,0 +1,60 @@
+"""Added indexes for list, filter and lookup queries
+
+Revision ID: a7d2e8f0c913
+Revises: 3f9b1c2d7a41
+Create Date: 2026-10-18 10:03:17.542861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e8f0c913'
+down_revision = '3f9b1c2d7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_date_time', ['date_time'], unique=False)
+        batch_op.create_index('ix_appointment_doctor_id_date_time', ['doctor_id', 'date_time'], unique=False)
+        batch_op.create_index('ix_appointment_patient_id_date_time', ['patient_id', 'date_time'], unique=False)
+        batch_op.create_index('ix_appointment_status_date_time', ['status', 'date_time'], unique=False)
+
+    with op.batch_alter_table('doctor', schema=None) as batch_op:
+        batch_op.create_index('ix_doctor_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_doctor_specialization', ['specialization'], unique=False)
+
+    with op.batch_alter_table('invoice', schema=None) as batch_op:
+        batch_op.create_index('ix_invoice_patient_id', ['patient_id'], unique=False)
+        batch_op.create_index('ix_invoice_status', ['status'], unique=False)
+        batch_op.create_index('ix_invoice_date_issued', ['date_issued'], unique=False)
+
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.create_index('ix_patient_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_patient_date_created', ['date_created'], unique=False)
+        batch_op.create_index('ix_patient_name_contact', ['name', 'contact'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.drop_index('ix_patient_name_contact')
+        batch_op.drop_index('ix_patient_date_created')
+        batch_op.drop_index('ix_patient_user_id')
+
+    with op.batch_alter_table('invoice', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoice_date_issued')
+        batch_op.drop_index('ix_invoice_status')
+        batch_op.drop_index('ix_invoice_patient_id')
+
+    with op.batch_alter_table('doctor', schema=None) as batch_op:
+        batch_op.drop_index('ix_doctor_specialization')
+        batch_op.drop_index('ix_doctor_user_id')
+
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_status_date_time')
+        batch_op.drop_index('ix_appointment_patient_id_date_time')
+        batch_op.drop_index('ix_appointment_doctor_id_date_time')
+        batch_op.drop_index('ix_appointment_date_time')
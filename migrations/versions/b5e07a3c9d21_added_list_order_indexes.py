@@ -0,0 +1,36 @@
+"""Added indexes for date-ordered patient and invoice lists
+
+Revision ID: b5e07a3c9d21
+Revises: 7b1e93c4d5a8
+Create Date: 2026-10-19 16:42:08.319574
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e07a3c9d21'
+down_revision = '7b1e93c4d5a8'
+branch_labels = None
+depends_on = None
+
+
+# Plain CREATE/DROP INDEX rather than batch operations: rebuilding `patient` would drop
+# the full-text index triggers (see app/patient/search.py)
+def upgrade():
+    op.create_index('ix_patient_gender_date_created', 'patient', ['gender', 'date_created'], unique=False)
+    op.drop_index('ix_patient_gender', table_name='patient')
+    op.create_index('ix_invoice_patient_id_date_issued', 'invoice', ['patient_id', 'date_issued'], unique=False)
+    op.create_index('ix_invoice_status_date_issued', 'invoice', ['status', 'date_issued'], unique=False)
+    op.drop_index('ix_invoice_patient_id', table_name='invoice')
+    op.drop_index('ix_invoice_status', table_name='invoice')
+
+
+def downgrade():
+    op.create_index('ix_invoice_status', 'invoice', ['status'], unique=False)
+    op.create_index('ix_invoice_patient_id', 'invoice', ['patient_id'], unique=False)
+    op.drop_index('ix_invoice_status_date_issued', table_name='invoice')
+    op.drop_index('ix_invoice_patient_id_date_issued', table_name='invoice')
+    op.create_index('ix_patient_gender', 'patient', ['gender'], unique=False)
+    op.drop_index('ix_patient_gender_date_created', table_name='patient')
@@ -0,0 +1,117 @@
+"""Added parsed availability windows to doctor
+
+Revision ID: c2f8a6d40e93
+Revises: 7d3e5a1f9b20
+Create Date: 2026-10-18 18:03:51.774129
+
+"""
+import json
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f8a6d40e93'
+down_revision = '7d3e5a1f9b20'
+branch_labels = None
+depends_on = None
+
+
+# A copy of app/availability.py's parser as of this revision, so the migration keeps
+# working however the app module changes later
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ALIASES = {
+    'daily': range(7), 'everyday': range(7),
+    'weekdays': range(5), 'weekday': range(5),
+    'weekends': range(5, 7), 'weekend': range(5, 7)
+}
+DEFAULT_HOURS = (9 * 60, 17 * 60)
+TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?'
+TIME_RANGE = re.compile(TIME + r'\s*(?:-|–|to)\s*' + TIME, re.IGNORECASE)
+
+
+def _day(token):
+    token = token.strip().lower().rstrip('.')
+    for index, day in enumerate(DAYS):
+        if len(token) >= 3 and day.startswith(token):
+            return index
+    raise ValueError(token)
+
+
+def _days(text):
+    days = []
+    for part in re.split(r'[,/&]|\band\b', text):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part in ALIASES:
+            days.extend(ALIASES[part])
+        elif '-' in part:
+            first, last = (_day(token) for token in part.split('-', 1))
+            days.extend((first + i) % 7 for i in range((last - first) % 7 + 1))
+        else:
+            days.append(_day(part))
+    if not days:
+        raise ValueError(text)
+    return days
+
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(hour)
+        hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        raise ValueError(hour, minute)
+    return hour * 60 + minute
+
+
+def _hours(match):
+    start = _minutes(*match.group(1, 2, 3))
+    end = _minutes(*match.group(4, 5, 6))
+    if end <= start and not match.group(6) and int(match.group(4)) < 12:
+        end += 12 * 60
+    if end <= start:
+        raise ValueError(match.group(0))
+    return start, end
+
+
+def windows_json(text):
+    # Weekly windows as stored in availability_windows; unreadable text gets none
+    windows = set()
+    try:
+        for segment in (text or '').split(';'):
+            segment = segment.strip()
+            if not segment:
+                continue
+            match = TIME_RANGE.search(segment)
+            if match:
+                days, hours = segment[:match.start()], _hours(match)
+            else:
+                days, hours = segment, DEFAULT_HOURS
+            for day in _days(days):
+                windows.add((day, *hours))
+    except ValueError:
+        windows = set()
+    return json.dumps([list(window) for window in sorted(windows)])
+
+
+
+def upgrade():
+    with op.batch_alter_table('doctor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('availability_windows', sa.Text(), nullable=True))
+
+    # Parse the existing free-text availability
+    doctor = sa.table('doctor', sa.column('id', sa.Integer), sa.column('availability', sa.String),
+                      sa.column('availability_windows', sa.Text))
+    conn = op.get_bind()
+    for doctor_id, text in conn.execute(sa.select(doctor.c.id, doctor.c.availability)).all():
+        conn.execute(doctor.update().where(doctor.c.id == doctor_id).values(
+            availability_windows=windows_json(text)))
+
+
+def downgrade():
+    with op.batch_alter_table('doctor', schema=None) as batch_op:
+        batch_op.drop_column('availability_windows')
@@ -0,0 +1,26 @@
+"""Added case-insensitive patient name index
+
+Revision ID: f3b7c1e9a2d4
+Revises: c2f8a6d40e93
+Create Date: 2026-10-18 19:02:41.220317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7c1e9a2d4'
+down_revision = 'c2f8a6d40e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.create_index('ix_patient_name_lower', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('patient', schema=None) as batch_op:
+        batch_op.drop_index('ix_patient_name_lower')
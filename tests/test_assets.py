@@ -0,0 +1,88 @@
+import unittest
+import gzip
+import re
+import os
+import shutil
+import tempfile
+from flask import url_for
+from app import create_app, db, assets
+from app.config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class AssetsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def css_url(self):
+        html = self.client.get('/login').get_data(as_text=True)
+        return re.search(r'href="(/static/css/main\.css\?v=[0-9a-f]+)"', html).group(1)
+
+    def test_fingerprinted_url_is_immutable(self):
+        url = self.css_url()
+        response = self.client.get(url)
+        self.assertEqual(response.headers['Cache-Control'], assets.IMMUTABLE)
+        with open(self.app.static_folder + '/css/main.css', 'rb') as f:
+            self.assertEqual(response.data, f.read())
+
+        # A stale or missing version is served, but must be revalidated
+        self.assertEqual(self.client.get('/static/css/main.css?v=old').headers['Cache-Control'], assets.REVALIDATE)
+        self.assertEqual(self.client.get('/static/css/main.css').headers['Cache-Control'], assets.REVALIDATE)
+
+    def test_compressed_and_conditional(self):
+        url = self.css_url()
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), self.client.get(url).data)
+
+        etag = response.headers['ETag']
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        # Too small to gain anything from compression
+        response = self.client.get('/static/js/main.js', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_avatars_are_versioned(self):
+        with self.app.test_request_context():
+            self.assertRegex(assets.fingerprint('profile_pics/default.jpg'), r'^[0-9a-f]{16}$')
+            self.assertIsNone(assets.fingerprint('profile_pics/ab/cd/' + 'a' * 32 + '_sm.webp'))
+        self.assertEqual(self.client.get('/static/profile_pics/missing.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/static/../config.py').status_code, 404)
+
+    def test_deleted_upload_is_not_served(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.app.config['PICTURES_FOLDER'] = folder
+        with open(os.path.join(folder, 'old.jpg'), 'wb') as f:
+            f.write(b'picture')
+        self.assertEqual(self.client.get('/static/profile_pics/old.jpg').status_code, 200)
+
+        # Swept away after it was served once
+        os.remove(os.path.join(folder, 'old.jpg'))
+        self.assertEqual(self.client.get('/static/profile_pics/old.jpg').status_code, 404)
+        self.assertNotIn('profile_pics/old.jpg', self.app.extensions['uploads'])
+
+    def test_static_url_matches_url_for(self):
+        with self.app.test_request_context():
+            for filename in ['css/main.css', 'profile_pics/default.jpg', 'profile_pics/ab/cd/' + 'a' * 32 + '.jpg']:
+                self.assertEqual(assets.static_url(filename), url_for('static', filename=filename))
+                self.assertIs(assets.static_url(filename), assets.static_url(filename))
+        with self.app.test_request_context(base_url='http://localhost/hms/'):
+            self.assertTrue(assets.static_url('css/main.css').startswith('/hms/static/css/main.css?v='))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import datetime
+import warnings
+from app import create_app, db, availability
+from app.config import Config
+from app.models import User, Doctor, Appointment, Patient
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class ParseTestCase(unittest.TestCase):
+    def test_formats(self):
+        weekdays = [(day, 540, 1020) for day in range(5)]
+        self.assertEqual(availability.parse('Mon-Fri'), weekdays)
+        self.assertEqual(availability.parse('Mon-Fri 9am-5pm'), weekdays)
+        self.assertEqual(availability.parse('mon-fri 9-5'), weekdays)
+        self.assertEqual(availability.parse('Mon-Fri, 9AM-5PM'), weekdays)
+        self.assertEqual(availability.parse('Tues, Thurs 10:00-14:30'), [(1, 600, 870), (3, 600, 870)])
+        self.assertEqual(availability.parse('Sat 9am-1pm; Fri-Sun 6pm-9pm'),
+                         [(4, 1080, 1260), (5, 540, 780), (5, 1080, 1260), (6, 1080, 1260)])
+        self.assertEqual(len(availability.parse('Daily 8:30am-12:30pm')), 7)
+        self.assertEqual(availability.parse('Sun 18:00-24:00'), [(6, 1080, 1440)])
+
+    def test_rejects(self):
+        for text in ['', 'Someday', 'Mon 5pm-9am', 'Mon 13pm-2pm', 'Monkey 9-5', 'Mon 9:00-24:30']:
+            with self.assertRaises(ValueError, msg=text):
+                availability.parse(text)
+        self.assertIsNone(availability.parse_or_none('whenever'))
+
+class SlotSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        users = [User(username=name, email=f'{name}@example.com', role='doctor', password_hash=admin.password_hash)
+                 for name in ('house', 'wilson', 'cuddy')]
+        self.house = Doctor(user=users[0], specialization='Diagnostics', availability='Mon 9am-10:30am')
+        self.wilson = Doctor(user=users[1], specialization='Oncology', availability='Mon-Fri 9-5')
+        cuddy = Doctor(user=users[2], specialization='Diagnostics', availability='sometimes')
+        patient = Patient(name='John Doe')
+        db.session.add_all([admin, patient, self.house, self.wilson, cuddy] + users)
+        # House is busy at 9:30 on Monday 3 March 2025
+        db.session.add(Appointment(doctor=self.house, patient=patient, reason='Checkup',
+                                   date_time=datetime.datetime(2025, 3, 3, 9, 30)))
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_windows_follow_availability(self):
+        self.assertEqual(availability.loads(self.house.availability_windows), [(0, 540, 630)])
+        self.wilson.availability = 'Sat 10-12'
+        self.assertEqual(availability.loads(self.wilson.availability_windows), [(5, 600, 720)])
+
+    def test_search(self):
+        response = self.client.get('/api/slots?specialization=Diagnostics&count=3&from=2025-03-03T08:00')
+        self.assertEqual([(s['doctor'], s['start']) for s in response.get_json()['slots']], [
+            ('house', '2025-03-03T09:00:00'),
+            ('house', '2025-03-03T10:00:00'),
+            ('house', '2025-03-10T09:00:00'),
+        ])
+
+        # Across specializations, ordered by time then doctor; starts on the next slot
+        slots = self.client.get('/api/slots?count=3&from=2025-03-03T09:10').get_json()['slots']
+        self.assertEqual([(s['doctor'], s['start']) for s in slots], [
+            ('wilson', '2025-03-03T09:30:00'),
+            ('house', '2025-03-03T10:00:00'),
+            ('wilson', '2025-03-03T10:00:00'),
+        ])
+
+    def test_search_arguments(self):
+        # Out-of-range counts still return the next slot
+        for count in ('0', '-3'):
+            slots = self.client.get(f'/api/slots?count={count}&days=0&from=2025-03-03T08:00').get_json()['slots']
+            self.assertEqual(len(slots), 1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            response = self.client.get('/api/slots?count=1&from=2025-03-03T08:00%2B02:00')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/slots?from=soon').status_code, 400)
+
+    def test_bad_profile_text(self):
+        response = self.client.post('/doctor/add', data=dict(
+            username='chase', email='chase@example.com', password='pw', confirm_password='pw',
+            specialization='Surgery', availability='whenever'))
+        self.assertIn(b'Unknown day', response.data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from flask import g
+from sqlalchemy import event
+from app import create_app, db
+from app.cache import page_cache, CachedPage
+from app.config import Config
+from app.models import User, Patient, Doctor, Invoice
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class PageCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        self.doctor = Doctor(user=doc_user, specialization='Diagnostics')
+        patient = Patient(name='John Doe')
+        invoice = Invoice(patient=patient, amount=50, description='Consultation')
+        db.session.add_all([admin, doc_user, self.doctor, patient, invoice])
+        db.session.commit()
+        self.invoice_id = invoice.id
+        page_cache.clear()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, login_id):
+        self.client.post('/login', data=dict(login_id=login_id, password='password'))
+
+    def get(self, url):
+        # Start each request without the user the previous one left in the shared g
+        g.pop('_login_user', None)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def test_doctor_directory_hit_without_queries(self):
+        self.login('admin')
+        hits = page_cache.stats()['hits']
+        response, statements = self.get('/doctors')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertTrue(statements)
+
+        response, statements = self.get('/doctors')
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        self.assertEqual(statements, [])
+        self.assertIn(b'Diagnostics', response.data)
+        self.assertEqual(page_cache.stats()['hits'], hits + 1)
+
+    def test_commit_invalidates(self):
+        self.login('admin')
+        self.get('/doctors')
+        self.get(f'/invoice/{self.invoice_id}')
+        self.doctor.specialization = 'Nephrology'
+        db.session.commit()
+
+        response, _ = self.get('/doctors')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertIn(b'Nephrology', response.data)
+        # Pages built from other tables are kept
+        self.assertEqual(self.get(f'/invoice/{self.invoice_id}')[0].headers['X-Cache'], 'HIT')
+
+    def test_keyed_per_user_and_arguments(self):
+        self.login('admin')
+        self.get('/doctors')
+        self.assertEqual(self.get('/doctors?specialization=Diagnostics')[0].headers['X-Cache'], 'MISS')
+        self.client.get('/logout')
+        self.login('house')
+        response, _ = self.get('/doctors')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertIn(b'house', response.data)
+
+    def test_pending_flash_bypasses_cache(self):
+        self.login('admin')
+        self.get('/doctors')
+        with self.client.session_transaction() as session:
+            session['_flashes'] = [('info', 'Saved!')]
+        response, _ = self.get('/doctors')
+        self.assertNotIn('X-Cache', response.headers)
+        self.assertIn(b'Saved!', response.data)
+
+    def test_lru_bound(self):
+        entry = lambda size, tables=frozenset(): CachedPage(b'x' * size, 200, [], tables, float('inf'))
+        page_cache.set('a', entry(40), (), 100)
+        page_cache.set('b', entry(40), (), 100)
+        page_cache.get('a')
+        page_cache.set('c', entry(40), (), 100)
+        self.assertIsNone(page_cache.get('b'))
+        self.assertIsNotNone(page_cache.get('a'))
+        self.assertEqual(page_cache.stats()['bytes'], 80)
+
+        # A page rendered across a commit to its tables isn't stored
+        versions = page_cache.versions(['doctor'])
+        page_cache.invalidate({'doctor'})
+        page_cache.set('d', entry(10, frozenset(['doctor'])), versions, 100)
+        self.assertIsNone(page_cache.get('d'))
+
+if __name__ == '__main__':
+    unittest.main()
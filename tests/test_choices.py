@@ -0,0 +1,101 @@
+import unittest
+import datetime
+from app import create_app, db, choices
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment, Invoice
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class ChoicesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        choices.invalidate()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        pat_user = User(username='john', email='john@example.com', role='patient', password_hash=admin.password_hash)
+        self.doctor = Doctor(user=doc_user, specialization='Diagnostics')
+        self.patient = Patient(name='John Doe', contact='5550001234', user=pat_user)
+        self.other = Patient(name='Jane Roe')
+        db.session.add_all([admin, doc_user, pat_user, self.doctor, self.patient, self.other,
+                            Patient(name='johanna Smith'), Patient(name='Mary Major')])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, login_id):
+        self.client.post('/login', data=dict(login_id=login_id, password='password'))
+
+    def test_doctor_choices_cached_until_commit(self):
+        self.assertEqual(choices.doctor_choices(), [(self.doctor.id, 'house (Diagnostics)')])
+        self.assertIs(choices.doctor_choices(), choices.doctor_choices())
+
+        self.doctor.specialization = 'Nephrology'
+        db.session.commit()
+        self.assertEqual(choices.doctor_choices(), [(self.doctor.id, 'house (Nephrology)')])
+
+    def test_search(self):
+        self.login('admin')
+        names = [p['name'] for p in self.client.get('/api/patients/search?q=JO').get_json()['patients']]
+        self.assertEqual(names, ['johanna Smith', 'John Doe'])
+        self.assertEqual(self.client.get('/api/patients/search?q=').get_json()['patients'], [])
+
+    def test_search_folds_case_like_the_database(self):
+        self.login('admin')
+        db.session.add(Patient(name='Élodie Martin'))
+        db.session.commit()
+        names = [p['name'] for p in self.client.get('/api/patients/search?q=ÉLO').get_json()['patients']]
+        self.assertEqual(names, ['Élodie Martin'])
+
+    def test_search_is_staff_only(self):
+        self.login('john')
+        self.assertEqual(self.client.get('/api/patients/search?q=jo').status_code, 403)
+
+    def test_forms_only_render_chosen_patient(self):
+        self.login('admin')
+        html = self.client.get('/invoice/new').get_data(as_text=True)
+        self.assertNotIn('Mary Major', html)
+
+        response = self.client.post('/invoice/new', data=dict(patient=self.other.id, description='X-ray',
+                                                             amount=80, status='Pending'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Invoice.query.one().patient_id, self.other.id)
+
+        response = self.client.post('/invoice/new', data=dict(patient=9999, description='X-ray',
+                                                             amount=80, status='Pending'))
+        self.assertIn(b'Please choose a patient', response.data)
+
+    def test_patient_books_only_for_self(self):
+        self.login('john')
+        data = dict(doctor=self.doctor.id, date_time='2025-03-03T09:30', reason='Checkup')
+        response = self.client.post('/appointment/book', data=dict(data, patient=self.other.id))
+        self.assertIn(b'Please choose a patient', response.data)
+        self.assertEqual(Appointment.query.count(), 0)
+
+        response = self.client.post('/appointment/book', data=dict(data, patient=self.patient.id))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Appointment.query.one().patient_id, self.patient.id)
+
+    def test_edit_appointment_without_patient(self):
+        appointment = Appointment(doctor=self.doctor, reason='Walk-in',
+                                  date_time=datetime.datetime(2025, 3, 3, 9, 30))
+        db.session.add(appointment)
+        db.session.commit()
+        self.login('admin')
+        response = self.client.get(f'/appointment/{appointment.id}/update')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Walk-in', response.data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from flask import g
+from sqlalchemy import event, insert
+from app import create_app, db, counters
+from app.config import Config
+from app.events import mark_changed
+from app.models import User, Patient, Invoice
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class ConditionalGetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        patient = Patient(name='John Doe')
+        invoice = Invoice(patient=patient, amount=50, description='Consultation')
+        db.session.add_all([admin, doc_user, patient, invoice])
+        db.session.commit()
+        self.patient_id = patient.id
+        self.invoice_id = invoice.id
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def get(self, url, etag=None):
+        g.pop('_login_user', None)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(url, headers={'If-None-Match': f'"{etag}"'} if etag else {})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def test_matching_etag_is_not_modified(self):
+        response, _ = self.get('/api/dashboard/stats')
+        self.assertEqual(response.status_code, 200)
+        etag = response.get_etag()[0]
+        self.assertTrue(etag)
+
+        response, statements = self.get('/api/dashboard/stats', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.get_etag()[0], etag)
+        # Just the version lookup
+        self.assertEqual(len(statements), 1)
+
+    def test_write_changes_etag(self):
+        url = f'/patient/{self.patient_id}'
+        etag = self.get(url)[0].get_etag()[0]
+
+        db.session.add(Invoice(patient_id=self.patient_id, amount=75, description='X-ray'))
+        db.session.commit()
+        response, _ = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get_etag()[0], etag)
+        self.assertIn('X-ray', response.get_data(as_text=True))
+
+    def test_unrelated_write_keeps_etag(self):
+        etag = self.get('/api/dashboard/stats')[0].get_etag()[0]
+        # The dashboard figures don't depend on the user table
+        db.session.add(User(username='nurse', email='nurse@example.com', role='receptionist'))
+        db.session.commit()
+        self.assertEqual(self.get('/api/dashboard/stats', etag)[0].status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        etag = self.get(f'/invoice/{self.invoice_id}')[0].get_etag()[0]
+        self.client.get('/logout')
+        self.client.post('/login', data=dict(login_id='house', password='password'))
+        response, _ = self.get(f'/invoice/{self.invoice_id}', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get_etag()[0], etag)
+
+    def test_pending_flash_skips_etag(self):
+        url = f'/patient/{self.patient_id}'
+        etag = self.get(url)[0].get_etag()[0]
+        with self.client.session_transaction() as session:
+            session['_flashes'] = [('success', 'Patient details have been updated!')]
+        response, _ = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_etag()[0])
+        self.assertIn('Patient details have been updated!', response.get_data(as_text=True))
+
+    def test_versions_roll_back_with_transaction(self):
+        before = counters.versions(['patient'])
+        db.session.add(Patient(name='Jane Roe'))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(counters.versions(['patient']), before)
+
+        db.session.add(Patient(name='Jane Roe'))
+        db.session.add(Patient(name='Jim Roe'))
+        db.session.commit()
+        self.assertEqual(counters.versions(['patient']), (before[0] + 1,))
+
+    def test_bulk_write_bumps_version(self):
+        before = counters.versions(['patient'])
+        db.session.execute(insert(Patient), [{'name': 'Bulk Row'}])
+        mark_changed(db.session, 'patient')
+        db.session.commit()
+        self.assertEqual(counters.versions(['patient']), (before[0] + 1,))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import datetime
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment, Invoice, StatsCounter
+from app import counters
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class CountersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def snapshot(self):
+        return {c.name: c.value for c in StatsCounter.query if c.value}
+
+    def test_events_match_rebuild(self):
+        user = User(username='house', email='house@example.com', role='doctor')
+        doctor = Doctor(user=user, specialization='Diagnostics')
+        patients = [Patient(name=f'Patient {i}') for i in range(3)]
+        db.session.add_all([user, doctor] + patients)
+        monday = datetime.datetime(2025, 3, 3, 9, 0)
+        appointments = [Appointment(doctor=doctor, patient=patients[0], reason='Checkup',
+                                    date_time=monday + datetime.timedelta(days=i)) for i in range(3)]
+        invoices = [Invoice(patient=patients[1], amount=amount, description='Consultation') for amount in (100, 250.5)]
+        db.session.add_all(appointments + invoices)
+        db.session.commit()
+
+        # Updates move appointments between day buckets and change revenue
+        appointments[0].date_time = monday + datetime.timedelta(days=2, hours=2)
+        invoices[0].amount = 80
+        db.session.commit()
+
+        db.session.delete(appointments[1])
+        db.session.delete(invoices[1])
+        db.session.delete(patients[2])
+        db.session.commit()
+
+        incremental = self.snapshot()
+        self.assertEqual(incremental['appointments'], 2)
+        self.assertEqual(incremental['appointments:2025-03-05'], 2)
+        self.assertEqual(incremental['revenue'], 80)
+        self.assertEqual(incremental['patients'], 2)
+
+        counters.rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_bump_is_one_upsert(self):
+        statements = []
+        connection = db.session.connection()
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            counters.bump(connection, 'appointments:2025-03-03', 2)
+            counters.bump(connection, 'appointments:2025-03-03', 1)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(counters.read(['appointments:2025-03-03'])['appointments:2025-03-03'], 3)
+        # No read-then-insert that two first writers of a new key could both take
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(all('ON CONFLICT' in statement for statement in statements))
+
+    def test_rebuild_command(self):
+        db.session.add(Patient(name='John Doe'))
+        db.session.commit()
+        db.session.execute(StatsCounter.__table__.delete())
+        db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=['stats', 'rebuild'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(counters.read(['patients'])['patients'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import json
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    DASHBOARD_STREAM_HEARTBEAT = 1
+
+class DashboardStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        db.session.add_all([admin, Patient(name='John Doe')])
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def next_payload(self, stream):
+        for chunk in stream:
+            chunk = chunk.decode()
+            if chunk.startswith('data: '):
+                return json.loads(chunk[len('data: '):])
+
+    def test_pushes_on_commit(self):
+        response = self.client.get('/api/dashboard/stream', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        stream = iter(response.response)
+        try:
+            self.assertEqual(self.next_payload(stream)['patients'], 1)
+
+            db.session.add(Patient(name='Jane Roe'))
+            db.session.commit()
+            self.assertEqual(self.next_payload(stream)['patients'], 2)
+        finally:
+            response.close()
+
+    def test_streams_are_capped(self):
+        self.app.config['DASHBOARD_STREAMS_PER_WORKER'] = 1
+        first = self.client.get('/api/dashboard/stream', buffered=False)
+        try:
+            self.assertEqual(first.status_code, 200)
+            refused = self.client.get('/api/dashboard/stream')
+            self.assertEqual(refused.status_code, 503)
+            self.assertIn('Retry-After', refused.headers)
+        finally:
+            first.close()
+        # Closing a stream frees its place, even before it sent anything
+        second = self.client.get('/api/dashboard/stream', buffered=False)
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+    def test_patients_cannot_subscribe(self):
+        self.client.get('/logout')
+        user = User(username='pat', email='pat@example.com', role='patient',
+                    password_hash=User.query.first().password_hash)
+        db.session.add(user)
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='pat', password='password'))
+        response = self.client.get('/api/dashboard/stream')
+        self.assertEqual(response.status_code, 401)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from app import create_app, db
+from app.config import Config
+from app.database import engine_options
+from app.models import Patient
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLITE_BUSY_TIMEOUT_MS = 2000
+
+class DatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'hms.db')
+        TestConfig.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.path
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.folder)
+
+    def test_pragmas(self):
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1) # NORMAL
+            self.assertEqual(pragma('busy_timeout'), 2000)
+            self.assertEqual(pragma('cache_size'), -65536)
+        self.assertEqual(db.engine.pool.size(), 10)
+
+    def test_profiles(self):
+        self.assertEqual(engine_options({}, 'sqlite://'), {})
+        options = engine_options({'DB_POOL_SIZE': 3}, 'postgresql://hms@db/hms')
+        self.assertEqual(options['pool_size'], 3)
+        self.assertTrue(options['pool_pre_ping'])
+
+    def test_write_commits_during_open_read(self):
+        db.session.add(Patient(name='John Doe'))
+        db.session.commit()
+
+        # A reader holding a transaction open (e.g. a slow export) would make the
+        # commit below wait for it in rollback-journal mode
+        reader = sqlite3.connect(self.path, isolation_level=None)
+        reader.execute('BEGIN')
+        self.assertEqual(reader.execute('SELECT count(*) FROM patient').fetchone()[0], 1)
+
+        started = time.monotonic()
+        db.session.add(Patient(name='Jane Roe'))
+        db.session.commit()
+        self.assertLess(time.monotonic() - started, 1)
+
+        # The reader keeps its snapshot until it ends the transaction
+        self.assertEqual(reader.execute('SELECT count(*) FROM patient').fetchone()[0], 1)
+        reader.execute('COMMIT')
+        self.assertEqual(reader.execute('SELECT count(*) FROM patient').fetchone()[0], 2)
+        reader.close()
+
+    def test_concurrent_readers_and_writers(self):
+        errors = []
+
+        def write(n):
+            with self.app.app_context():
+                try:
+                    for i in range(20):
+                        db.session.add(Patient(name=f'Writer {n} patient {i}'))
+                        db.session.commit()
+                except Exception as e:
+                    errors.append(e)
+
+        def read():
+            with self.app.app_context():
+                try:
+                    for _ in range(50):
+                        db.session.query(Patient).count()
+                        db.session.rollback()
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Patient.query.count(), 80)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import pandas as pd
+from app import create_app, db
+from app.config import Config
+from app.models import User, Doctor
+from app.doctor import importer
+from app import counters
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_WORKERS = 2
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['Username', 'Email', 'Password', 'Specialization', 'Availability'])
+
+class DoctorImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(User(username='admin', email='admin@example.com', role='admin'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_import_with_rejects(self):
+        result = importer.import_doctors(frame([
+            ['house', 'house@example.com', 12345, 'Diagnostics', None],
+            ['wilson', 'wilson@example.com', 'secret', 'Oncology', 'Mon 9am-1pm'],
+            ['house', 'other@example.com', 'secret', 'Surgery', ''],        # repeated in file
+            ['admin', 'new@example.com', 'secret', 'Surgery', ''],          # username taken
+            ['cuddy', 'cuddy@example.com', None, 'Administration', ''],     # no password
+            [None, 'nobody@example.com', 'secret', 'Surgery', ''],          # no username
+            ['cuddy', 'cuddy@example.com', 'secret', 'Administration', ''], # corrected copy
+        ]))
+        self.assertEqual(result.inserted, 3)
+        self.assertEqual(result.rejects, [
+            (4, 'Duplicate row in file'),
+            (5, 'Username or email already exists'),
+            (6, 'Missing password'),
+            (7, 'Missing username, email or specialization'),
+        ])
+
+        house = Doctor.query.join(User).filter(User.username == 'house').one()
+        self.assertEqual(house.user.role, 'doctor')
+        self.assertEqual(house.availability, importer.DEFAULT_AVAILABILITY)
+        self.assertTrue(house.user.check_password('12345'))
+        self.assertTrue(User.query.filter_by(username='cuddy').one().check_password('secret'))
+        self.assertEqual(counters.read(['doctors'])['doctors'], 3)
+
+    def test_parallel_hashing(self):
+        rows = [[f'doc{i}', f'doc{i}@example.com', f'pw{i}', 'General', ''] for i in range(importer.PARALLEL_HASH_MIN)]
+        result = importer.import_doctors(frame(rows))
+        self.assertEqual(result.inserted, len(rows))
+
+        users = User.query.filter(User.role == 'doctor').order_by(User.id).all()
+        self.assertEqual([u.username for u in users], [row[0] for row in rows])
+        self.assertTrue(users[-1].check_password(rows[-1][2]))
+        self.assertEqual([d.user_id for d in Doctor.query.order_by(Doctor.id)], [u.id for u in users])
+
+if __name__ == '__main__':
+    unittest.main()
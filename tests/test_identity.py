@@ -0,0 +1,96 @@
+import unittest
+from flask import g
+from sqlalchemy import event
+from app import create_app, db, identity
+from app.config import Config
+from app.models import User, Patient, Doctor
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class IdentityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        pat_user = User(username='john', email='john@example.com', role='patient', password_hash=admin.password_hash)
+        self.doctor = Doctor(user=doc_user, specialization='Diagnostics')
+        self.patient = Patient(name='John Doe', user=pat_user)
+        db.session.add_all([admin, doc_user, pat_user, self.doctor, self.patient])
+        db.session.commit()
+        self.patient_id = self.patient.id
+        identity.invalidate()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, login_id):
+        self.client.post('/login', data=dict(login_id=login_id, password='password'))
+
+    def user_queries(self, url):
+        # The test's app context (and g) is shared by every request; start this one
+        # without the user the previous request loaded
+        g.pop('_login_user', None)
+        g.pop('identity', None)
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and 'FROM user' in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def test_profile_loaded_with_user_then_cached(self):
+        self.login('john')
+        db.session.expunge_all()
+        identity.invalidate()
+        response, statements = self.user_queries('/invoices')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('JOIN patient', statements[0])
+
+        db.session.expunge_all()
+        response, statements = self.user_queries('/invoices')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(statements, [])
+        self.assertEqual(self.client.get('/patients').headers['Location'], f'/patient/{self.patient_id}')
+        self.assertIn(b'John Doe', self.client.get(f'/patient/{self.patient_id}').data)
+
+    def test_account_changes_invalidate(self):
+        self.login('house')
+        self.assertEqual(self.client.get('/doctor/profile').status_code, 200)
+        self.client.post('/doctor/profile', data=dict(specialization='Nephrology', availability='Mon-Fri 9am-5pm'))
+        self.assertEqual(db.session.get(Doctor, self.doctor.id).specialization, 'Nephrology')
+        self.assertIn(b'Nephrology', self.client.get('/doctor/profile').data)
+
+        db.session.get(User, self.doctor.user_id).role = 'receptionist'
+        db.session.commit()
+        g.pop('_login_user', None)
+        response = self.client.get('/doctor/profile')
+        self.assertEqual(response.status_code, 302)
+
+    def test_disabled(self):
+        self.app.config['USER_CACHE_TTL'] = 0
+        self.login('john')
+        db.session.expunge_all()
+        self.assertEqual(len(self.user_queries('/invoices')[1]), 1)
+        db.session.expunge_all()
+        self.assertEqual(len(self.user_queries('/invoices')[1]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app import create_app, db, images
+from app.config import Config
+from app.models import User, Patient
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    IMAGES_INLINE = True
+
+def photo(size=(1600, 1200), fmt='JPEG'):
+    output = BytesIO()
+    Image.new('RGB', size, 'teal').save(output, fmt)
+    output.seek(0)
+    return output
+
+class ImagesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        # Work on a scratch copy of the pictures folder
+        self.folder = tempfile.mkdtemp()
+        shutil.copy(os.path.join(self.app.static_folder, 'profile_pics', 'default.jpg'), self.folder)
+        self.app.config['PICTURES_FOLDER'] = self.folder
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        db.session.add(admin)
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_upload_renders_variants(self):
+        response = self.client.post('/patient/new', data={
+            'name': 'John Doe', 'age': 30, 'gender': 'Male', 'contact': '5551234567',
+            'address': '1 Main St', 'picture': (photo(), 'phone.JPG')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 302)
+
+        patient = Patient.query.one()
+        self.assertEqual(patient.image_sizes, 'sm,md,lg')
+        for size, px in images.SIZES.items():
+            for ext in images.FORMATS:
+                with Image.open(images.picture_path(images.variant_name(patient.image_file, size, ext))) as variant:
+                    self.assertEqual(variant.size, (px, px))
+
+        html = self.client.get('/patients').get_data(as_text=True)
+        self.assertIn(images.variant_name(patient.image_file, 'sm', 'webp'), html)
+        self.assertIn(images.variant_name(patient.image_file, 'sm', 'jpg'), html)
+
+    def add_patient(self, name, picture):
+        return self.client.post('/patient/new', data={
+            'name': name, 'age': 30, 'gender': 'Male', 'contact': '5551234567',
+            'address': '1 Main St', 'picture': (picture, 'photo.png')}, content_type='multipart/form-data')
+
+    def test_identical_uploads_share_a_file(self):
+        self.add_patient('John Doe', photo(fmt='PNG'))
+        self.add_patient('Jane Roe', photo(fmt='PNG'))
+        john, jane = Patient.query.order_by(Patient.id).all()
+        self.assertEqual(john.image_file, jane.image_file)
+        self.assertRegex(john.image_file, r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}\.png$')
+        self.assertEqual(jane.image_sizes, 'sm,md,lg')
+        shard = os.path.dirname(images.picture_path(john.image_file))
+        self.assertEqual(len(os.listdir(shard)), 1 + len(images.SIZES) * len(images.FORMATS))
+
+    def test_sweep_removes_unreferenced(self):
+        self.add_patient('John Doe', photo(fmt='PNG'))
+        john = Patient.query.one()
+        old = john.image_file
+        self.client.post(f'/patient/{john.id}/update', data={
+            'name': 'John Doe', 'age': 30, 'gender': 'Male', 'contact': '5551234567',
+            'address': '1 Main St', 'picture': (photo(size=(800, 800), fmt='PNG'), 'new.png')},
+            content_type='multipart/form-data')
+        self.assertNotEqual(Patient.query.one().image_file, old)
+
+        result = self.app.test_cli_runner().invoke(args=['images', 'sweep', '--min-age', '0'])
+        self.assertIn(f'Removed {old}', result.output)
+        self.assertFalse(os.path.exists(images.picture_path(old)))
+        self.assertTrue(os.path.exists(images.picture_path(Patient.query.one().image_file)))
+        self.assertTrue(os.path.exists(images.picture_path('default.jpg')))
+        self.assertFalse(os.path.exists(os.path.dirname(images.picture_path(old))))
+
+    def test_reupload_survives_sweep(self):
+        self.add_patient('John Doe', photo(fmt='PNG'))
+        john = Patient.query.one()
+        stored = john.image_file
+        john.image_file = 'default.jpg'
+        db.session.commit()
+        hour_ago = time.time() - 3600
+        for name in os.listdir(os.path.dirname(images.picture_path(stored))):
+            os.utime(os.path.join(os.path.dirname(images.picture_path(stored)), name), (hour_ago, hour_ago))
+
+        # Uploaded again, but its row has not committed yet
+        self.assertEqual(images.store_upload(FileStorage(photo(fmt='PNG'), 'again.png')), stored)
+        removed, _ = images.sweep(min_age=60)
+        self.assertEqual(removed, [])
+        self.assertTrue(os.path.exists(images.picture_path(images.variant_name(stored, 'sm', 'webp'))))
+
+    def test_new_picture_clears_old_sizes(self):
+        patient = Patient(name='John Doe', image_file='old.jpg', image_sizes='sm,md,lg')
+        patient.image_file = 'new.jpg'
+        # Until the new variants render, pages fall back to the upload itself
+        self.assertIsNone(patient.image_sizes)
+        with self.app.test_request_context():
+            self.assertTrue(images.avatar_url(patient, 'sm').endswith('/new.jpg'))
+
+    def test_upload_must_be_a_picture(self):
+        # Named like a picture, but not one; rejected before anything is stored
+        response = self.add_patient('John Doe', BytesIO(b'not a picture'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('not a JPEG or PNG picture', response.get_data(as_text=True))
+        self.assertEqual(Patient.query.count(), 0)
+        self.assertEqual(os.listdir(self.folder), ['default.jpg'])
+
+        truncated = BytesIO(photo(fmt='PNG').getvalue()[:-20])
+        self.assertEqual(self.add_patient('John Doe', truncated).status_code, 200)
+        self.assertEqual(self.add_patient('John Doe', photo(fmt='GIF')).status_code, 200)
+        self.assertEqual(self.add_patient('John Doe', photo(fmt='PNG')).status_code, 302)
+
+    def test_rollback_discards_pending(self):
+        images.schedule(db.session, 'missing.png')
+        db.session.rollback()
+        db.session.commit()
+        self.assertNotIn('pending_images', db.session.info)
+
+    def test_default_picture_has_no_variants(self):
+        html = self.client.get('/account').get_data(as_text=True)
+        self.assertIn('profile_pics/default.jpg', html)
+        self.assertNotIn('image/webp', html)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import re
+from flask import g
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    SLOW_QUERY_MS = None
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.metrics = self.app.extensions['instrumentation']
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        db.session.add_all([admin, doc_user, Patient(name='John Doe')])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, login_id):
+        self.client.post('/login', data=dict(login_id=login_id, password='password'))
+        g.pop('_login_user', None)
+
+    def test_counts_queries_and_render_time_per_endpoint(self):
+        self.login('admin')
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            self.assertEqual(self.client.get('/patients').status_code, 200)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        queries = self.metrics.histogram('hms_request_sql_queries', 'patient.list_patients')
+        self.assertEqual(queries.count, 1)
+        self.assertEqual(queries.sum, len(statements))
+        self.assertGreater(self.metrics.histogram('hms_request_sql_seconds', 'patient.list_patients').sum, 0)
+        render = self.metrics.histogram('hms_request_render_seconds', 'patient.list_patients')
+        duration = self.metrics.histogram('hms_request_duration_seconds', 'patient.list_patients')
+        self.assertGreater(render.sum, 0)
+        self.assertLess(render.sum, duration.sum)
+
+    def test_metrics_in_prometheus_format(self):
+        self.login('admin')
+        self.client.get('/patients')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        text = response.get_data(as_text=True)
+        self.assertIn('hms_requests_total{endpoint="patient.list_patients",status="200"} 1', text)
+        self.assertIn('# TYPE hms_request_sql_queries histogram', text)
+        self.assertIn('hms_request_sql_queries_count{endpoint="patient.list_patients"} 1', text)
+        self.assertIn('hms_request_sql_queries_bucket{endpoint="patient.list_patients",le="+Inf"} 1', text)
+        self.assertIn('# TYPE hms_page_cache_hits_total counter', text)
+        for line in text.splitlines():
+            self.assertRegex(line, r'^(# (HELP|TYPE) \w+ .+|\w+(\{[^}]*\})? [0-9.e+-]+)$')
+
+        # Buckets are cumulative
+        counts = [int(n) for n in re.findall(
+            r'hms_request_duration_seconds_bucket\{endpoint="patient.list_patients",le="[^"]+"\} (\d+)', text)]
+        self.assertEqual(counts, sorted(counts))
+
+    def test_metrics_admin_only(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 302)
+        self.login('house')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_slow_query_logged_with_route(self):
+        self.app.config['SLOW_QUERY_MS'] = 0
+        self.login('admin')
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/patients')
+        self.assertTrue(any('GET /patients (patient.list_patients)' in line and 'SELECT' in line
+                            for line in logs.output))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import datetime
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+import pandas as pd
+from app import create_app, db
+from app.jobs import worker
+from app.config import Config
+from app.models import User, Patient, Doctor, Job
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    JOBS_INLINE = True
+
+class JobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        reception = User(username='desk', email='desk@example.com', role='receptionist',
+                         password_hash=admin.password_hash)
+        db.session.add_all([admin, reception, Patient(name='John Doe', contact='5551234567', age=30)])
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_export_download(self):
+        response = self.client.get('/patient/export', follow_redirects=True)
+        self.assertIn(b'Patient Export', response.data)
+
+        job = Job.query.one()
+        self.assertEqual(job.status, 'finished')
+        response = self.client.get(f'/jobs/{job.id}/download')
+        self.assertEqual(response.status_code, 200)
+        df = pd.read_excel(BytesIO(response.data), dtype={'Contact': str})
+        self.assertEqual(df['Name'].tolist(), ['John Doe'])
+        self.assertEqual(df['Contact'].tolist(), ['5551234567'])
+
+    def test_csv_export_streams(self):
+        doc_user = User(username='house', email='house@example.com', role='doctor')
+        db.session.add(Doctor(user=doc_user, specialization='Diagnostics', availability='Mon 9am-1pm'))
+        db.session.commit()
+
+        response = self.client.get('/doctor/export?format=csv')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertEqual(response.get_data(as_text=True).splitlines(), [
+            'Username,Email,Specialization,Availability',
+            'house,house@example.com,Diagnostics,Mon 9am-1pm',
+        ])
+
+        response = self.client.get('/patient/export?format=csv')
+        self.assertEqual(response.get_data(as_text=True).splitlines()[1], 'John Doe,30,,5551234567,,')
+        self.assertEqual(Job.query.count(), 0)
+
+    def test_doctor_import(self):
+        output = BytesIO()
+        pd.DataFrame([
+            ['house', 'house@example.com', 'secret', 'Diagnostics', 'Mon-Fri 9am-5pm'],
+            ['admin', 'other@example.com', 'secret', 'Surgery', 'Mon 9am-1pm'], # username taken
+        ], columns=['Username', 'Email', 'Password', 'Specialization', 'Availability']).to_excel(output, index=False)
+        output.seek(0)
+
+        response = self.client.post('/doctor/import', data={'file': (output, 'doctors.xlsx')},
+                                    content_type='multipart/form-data', headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertEqual(job['message'], '1 doctors imported successfully!')
+        self.assertEqual(job['errors'], [{'row': 3, 'reason': 'Username or email already exists'}])
+        self.assertEqual(Doctor.query.one().specialization, 'Diagnostics')
+
+    def test_bad_file_fails_job(self):
+        output = BytesIO()
+        pd.DataFrame([['x']], columns=['Wrong']).to_excel(output, index=False)
+        output.seek(0)
+        response = self.client.post('/patient/import', data={'file': (output, 'patients.xlsx')},
+                                    content_type='multipart/form-data', headers={'Accept': 'application/json'})
+        job = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['message'], 'Invalid file format. Please use the template.')
+
+    def test_jobs_are_private(self):
+        self.client.get('/patient/export')
+        job = Job.query.one()
+        self.client.get('/logout')
+        self.client.post('/login', data=dict(login_id='desk', password='password'))
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}').status_code, 403)
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/download').status_code, 403)
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+
+    def test_pool_started_by_first_job(self):
+        self.assertIsNone(create_app(TestConfig).extensions['jobs'])
+
+    def test_orphaned_jobs_fail(self):
+        # A process that has exited, the current one, and one on another host
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        host = socket.gethostname()
+        old = datetime.datetime.utcnow() - datetime.timedelta(hours=TestConfig.JOB_ORPHAN_HOURS + 1)
+        jobs = {
+            'dead': Job(id='dead', kind='patient_export', user_id=1, status='running', owner=f'{host}:{child.pid}'),
+            'alive': Job(id='alive', kind='patient_export', user_id=1, status='queued', owner=worker.owner()),
+            'remote': Job(id='remote', kind='patient_export', user_id=1, status='running', owner='elsewhere:1'),
+            'stale': Job(id='stale', kind='patient_export', user_id=1, status='running', owner='elsewhere:1',
+                         created_at=old),
+        }
+        db.session.add_all(jobs.values())
+        db.session.commit()
+
+        self.assertEqual(self.client.get('/api/jobs/dead').get_json()['status'], 'failed')
+        self.assertEqual(worker.fail_orphans(), 1)
+        self.assertEqual({job.id: job.status for job in Job.query}, {
+            'dead': 'failed', 'alive': 'queued', 'remote': 'running', 'stale': 'failed'})
+
+    def test_old_results_expire(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.app.config['JOBS_FOLDER'] = folder
+        self.client.get('/patient/export')
+        job = Job.query.one()
+        self.assertTrue(os.path.isfile(job.result_file))
+
+        past = time.time() - self.app.config['JOB_RESULT_TTL'] - 60
+        os.utime(job.result_file, (past, past))
+        self.assertEqual(worker.expire_files(), [os.path.basename(job.result_file)])
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/download').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
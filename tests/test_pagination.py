@@ -0,0 +1,94 @@
+import unittest
+import datetime
+import re
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment
+from app.pagination import PER_PAGE
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class PaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor',
+                        password_hash=admin.password_hash)
+        doctors = [Doctor(user=doc_user, specialization='Diagnostics') for _ in range(3)]
+        patient = Patient(name='John Doe')
+        db.session.add_all([admin, doc_user, patient] + doctors)
+
+        # Several appointments (with different doctors) share a timestamp so the id
+        # tiebreaker matters
+        start = datetime.datetime(2025, 3, 1, 9, 0)
+        for i in range(PER_PAGE * 2 + 5):
+            db.session.add(Appointment(doctor=doctors[i % 3], patient=patient,
+                                       date_time=start + datetime.timedelta(days=i // 3),
+                                       reason=f'Visit {i}',
+                                       status='Completed' if i % 2 else 'Scheduled'))
+        db.session.commit()
+
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def collect(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            html = response.get_data(as_text=True)
+            seen.extend(int(i) for i in re.findall(r'/appointment/(\d+)/update', html))
+            match = re.search(r'href="([^"]*cursor=[^"]*)"', html)
+            url = match.group(1).replace('&amp;', '&') if match else None
+        return seen
+
+    def test_pages_cover_every_row_once(self):
+        seen = self.collect('/appointments')
+        expected = [a.id for a in Appointment.query.order_by(Appointment.date_time, Appointment.id)]
+        self.assertEqual(seen, expected)
+
+    def test_filters_carry_across_pages(self):
+        seen = self.collect('/appointments?status=Completed&date_from=2025-03-02')
+        expected = [a.id for a in Appointment.query.filter(
+            Appointment.status == 'Completed',
+            Appointment.date_time >= datetime.datetime(2025, 3, 2)
+        ).order_by(Appointment.date_time, Appointment.id)]
+        self.assertTrue(expected)
+        self.assertEqual(seen, expected)
+
+    def test_patient_filters_carry_across_pages(self):
+        db.session.add_all([Patient(name=f'Patient {i}', gender='Female' if i % 2 else 'Male')
+                            for i in range(PER_PAGE * 3)])
+        db.session.commit()
+        seen, url = [], '/patients?gender=Female'
+        while url:
+            html = self.client.get(url).get_data(as_text=True)
+            seen.extend(int(i) for i in re.findall(r'ID: #(\d+)', html))
+            match = re.search(r'href="([^"]*cursor=[^"]*)"', html)
+            url = match.group(1).replace('&amp;', '&') if match else None
+        expected = [p.id for p in Patient.query.filter_by(gender='Female').order_by(Patient.date_created, Patient.id)]
+        self.assertEqual(len(expected), PER_PAGE * 3 // 2)
+        self.assertEqual(seen, expected)
+
+        html = self.client.get('/patients?date_to=2000-01-01').get_data(as_text=True)
+        self.assertNotIn('ID: #', html)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/appointments?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from io import BytesIO
+import pandas as pd
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient
+from app import counters
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    JOBS_INLINE = True
+
+def spreadsheet(rows):
+    output = BytesIO()
+    columns = ['Name', 'Age', 'Gender', 'Contact', 'Address', 'Medical History']
+    pd.DataFrame(rows, columns=columns).to_excel(output, index=False)
+    output.seek(0)
+    return output
+
+class PatientImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        db.session.add_all([admin, Patient(name='Existing Person', contact='5550000000')])
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_import_with_rejects(self):
+        rows = [
+            ['John Doe', 30, 'male', 5551234567, '1 Main St', 'Asthma'],
+            ['Jane Roe', None, 'Female', '5559876543', '2 Main St', None],
+            ['John Doe', 30, 'Male', 5551234567, '1 Main St', 'Asthma'],     # repeated in file
+            ['Existing Person', 41, 'Other', 5550000000, '3 Main St', ''],   # already in the database
+            [None, 22, 'Male', 5550001111, '4 Main St', ''],                 # no name
+            ['Old Timer', 'abc', 'Male', 5550002222, '5 Main St', ''],       # bad age
+            ['Old Timer', 88, 'Male', 5550002222, '5 Main St', ''],          # corrected copy
+        ]
+        response = self.client.post('/patient/import', data={'file': (spreadsheet(rows), 'patients.xlsx')},
+                                    content_type='multipart/form-data', headers={'Accept': 'application/json'})
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response.get_json()['status_url']).get_json()
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['message'], '3 patients imported successfully!')
+        self.assertEqual((job['processed'], job['total']), (7, 7))
+        self.assertEqual(job['errors'], [
+            {'row': 4, 'reason': 'Duplicate row in file'},
+            {'row': 5, 'reason': 'Patient already exists'},
+            {'row': 6, 'reason': 'Missing name'},
+            {'row': 7, 'reason': 'Invalid age'},
+        ])
+
+        john = Patient.query.filter_by(name='John Doe').one()
+        self.assertEqual(john.contact, '5551234567')
+        self.assertEqual(john.gender, 'Male')
+        self.assertEqual(john.age, 30)
+        self.assertEqual(john.image_file, 'default.jpg')
+        self.assertIsNone(Patient.query.filter_by(name='Jane Roe').one().age)
+        self.assertEqual(Patient.query.filter_by(name='Old Timer').one().age, 88)
+        self.assertEqual(Patient.query.count(), 4)
+        self.assertEqual(counters.read(['patients'])['patients'], 4)
+
+    def test_reimport_skips_everything(self):
+        rows = [['John Doe', 30, 'Male', 5551234567, '1 Main St', '']]
+        for _ in range(2):
+            self.client.post('/patient/import', data={'file': (spreadsheet(rows), 'patients.xlsx')},
+                             content_type='multipart/form-data')
+        self.assertEqual(Patient.query.filter_by(name='John Doe').count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import re
+from unittest import mock
+from sqlalchemy import insert
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient
+from app.patient import search
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class PatientSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        self.smith = Patient(name='John Smith', contact='5550001234', medical_history='Asthma since childhood')
+        self.notes = Patient(name='Mary Major', address='12 Smithfield Road', medical_history='Seen by Dr. Smith')
+        db.session.add_all([admin, self.smith, self.notes, Patient(name='José Álvarez')])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def names(self, query):
+        return [p.name for p in search.search(query)]
+
+    def test_ranked_matches(self):
+        # A name hit outranks the same word in the notes; words match as prefixes
+        self.assertEqual(self.names('smith'), ['John Smith', 'Mary Major'])
+        self.assertEqual(self.names('jo smi'), ['John Smith'])
+        self.assertEqual(self.names('555000'), ['John Smith'])
+        self.assertEqual(self.names('asthma'), ['John Smith'])
+        self.assertEqual(self.names('jose alvarez'), ['José Álvarez'])
+
+    def pages(self, query):
+        names, cursor = [], None
+        while True:
+            found, cursor = search.search_page(query, cursor, limit=7)
+            names += [p.name for p in found]
+            if cursor is None:
+                return names
+
+    def add_notes_matches(self, count):
+        db.session.execute(insert(Patient), [dict(name=f'Patient {i}', medical_history='Referred by Dr. Smith')
+                                             for i in range(count)])
+        db.session.commit()
+
+    def test_ranked_pages(self):
+        # An old name hit still beats the newer matches in the notes, and every match is reachable
+        self.add_notes_matches(20)
+        names = self.pages('smith')
+        self.assertEqual(names[0], 'John Smith')
+        self.assertEqual(len(names), 22)
+        self.assertEqual(len(set(names)), 22)
+
+    def test_broad_queries_list_newest_first(self):
+        self.add_notes_matches(20)
+        with mock.patch.object(search, 'RANKED', 10):
+            names = self.pages('smith')
+        self.assertEqual(names[:2], ['Patient 19', 'Patient 18'])
+        self.assertEqual(names[-2:], ['Mary Major', 'John Smith'])
+        self.assertEqual(len(set(names)), 22)
+
+    def test_list_pages_through_matches(self):
+        self.add_notes_matches(search.LIMIT)
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+        html = self.client.get('/patients?q=smith').get_data(as_text=True)
+        cursor = re.search(r'cursor=([\w-]+)', html).group(1)
+        html = self.client.get(f'/patients?q=smith&cursor={cursor}').get_data(as_text=True)
+        # 52 matches: the last two on the second page
+        self.assertEqual(len(set(re.findall(r'Patient \d+', html))), 2)
+        self.assertNotIn('cursor=', html)
+        self.assertEqual(self.client.get('/patients?q=smith&cursor=bad').status_code, 400)
+
+    def test_operators_are_literal(self):
+        self.assertEqual(self.names('smith OR "mary'), [])
+        self.assertEqual(self.names('NEAR(* -'), [])
+        self.assertEqual(self.names('  '), [])
+
+    def test_index_follows_writes(self):
+        self.smith.name = 'John Smythe'
+        db.session.delete(self.notes)
+        db.session.execute(insert(Patient), [dict(name='Imported Smith', medical_history='')])
+        db.session.commit()
+        self.assertEqual(self.names('smith'), ['Imported Smith'])
+        self.assertEqual(self.names('smythe'), ['John Smythe'])
+
+    def test_rebuild(self):
+        self.assertEqual(search.rebuild(), 3)
+        self.assertEqual(self.names('smith'), ['John Smith', 'Mary Major'])
+
+    def test_list_page(self):
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+        html = self.client.get('/patients?q=asthma').get_data(as_text=True)
+        self.assertIn('John Smith', html)
+        self.assertNotIn('Mary Major', html)
+        self.assertIn('No patients match', self.client.get('/patients?q=zebra').get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import datetime
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment, Invoice
+
+# Maximum number of SQL statements a single list page may run, regardless of row count
+QUERY_BUDGET = 5
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class QueryBudgetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        db.session.add(admin)
+
+        start = datetime.datetime(2025, 1, 6, 9, 0)
+        for i in range(20):
+            user = User(username=f'doc{i}', email=f'doc{i}@example.com', role='doctor',
+                        password_hash=admin.password_hash)
+            doctor = Doctor(user=user, specialization='General')
+            patient = Patient(name=f'Patient {i}', contact=f'555000{i:04d}')
+            db.session.add_all([user, doctor, patient])
+            for j in range(2):
+                db.session.add(Appointment(doctor=doctor, patient=patient,
+                                           date_time=start + datetime.timedelta(hours=i, days=j),
+                                           reason='Checkup'))
+            db.session.add(Invoice(patient=patient, amount=100, description='Consultation'))
+        db.session.commit()
+
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_queries(self, url):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200)
+        return statements
+
+    def assertWithinBudget(self, url):
+        statements = self.count_queries(url)
+        self.assertLessEqual(len(statements), QUERY_BUDGET,
+                             f'{url} ran {len(statements)} queries:\n' + '\n'.join(statements))
+
+    def test_appointment_list(self):
+        self.assertWithinBudget('/appointments')
+
+    def test_invoice_list(self):
+        self.assertWithinBudget('/invoices')
+
+    def test_doctor_list(self):
+        self.assertWithinBudget('/doctors')
+
+    def test_patient_list(self):
+        self.assertWithinBudget('/patients')
+
+    def test_dashboard(self):
+        self.assertWithinBudget('/dashboard')
+        self.assertWithinBudget('/home')
+
+    def test_dashboard_stats_cached_until_write(self):
+        self.count_queries('/api/dashboard/stats')
+        # Only the session's user is loaded while the figures are cached
+        self.assertLessEqual(len(self.count_queries('/api/dashboard/stats')), 1)
+
+        db.session.add(Patient(name='Walk-in'))
+        db.session.commit()
+        self.assertGreater(len(self.count_queries('/api/dashboard/stats')), 1)
+        self.assertEqual(self.client.get('/api/dashboard/stats').json['patients'], 21)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import datetime
+import re
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment, Invoice
+
+# Directory-sized reference data that list/dropdown queries read in full on purpose
+ALLOWED_FULL_SCANS = {'doctor'}
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class QueryPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        pat_user = User(username='john', email='john@example.com', role='patient', password_hash=admin.password_hash)
+        doctor = Doctor(user=doc_user, specialization='Diagnostics')
+        patient = Patient(name='John Doe', contact='5550001234', user=pat_user)
+        db.session.add_all([admin, doc_user, pat_user, doctor, patient])
+        start = datetime.datetime(2025, 3, 3, 9, 0)
+        for i in range(60):
+            db.session.add(Appointment(doctor=doctor, patient=patient, reason='Checkup',
+                                       date_time=start + datetime.timedelta(hours=i)))
+            db.session.add(Invoice(patient=patient, amount=50, description='Consultation'))
+        db.session.commit()
+        self.patient_id = patient.id
+        self.doctor_id = doctor.id
+        self.invoice_id = Invoice.query.first().id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def capture(self, login_id, urls):
+        # [(url, statement, parameters)] for every SELECT the pages ran
+        self.client.post('/login', data=dict(login_id=login_id, password='password'))
+        statements = []
+        current = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((current[-1], statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            for url in urls:
+                current.append(url)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                # Follow the keyset cursor so the "next page" queries are checked too
+                match = re.search(r'href="([^"]*cursor=[^"]*)"', response.get_data(as_text=True))
+                if match:
+                    self.assertEqual(self.client.get(match.group(1).replace('&amp;', '&')).status_code, 200)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.client.get('/logout')
+        return statements
+
+    def plan(self, statement, parameters):
+        with db.engine.connect() as conn:
+            return [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+    def assertNoFullScans(self, statements):
+        self.assertTrue(statements)
+        for url, statement, parameters in statements:
+            plan = self.plan(statement, parameters)
+            # Only an unfiltered query may walk a table: an index, or the table itself in
+            # primary-key order up to LIMIT rows (the first page of a keyset list). A query
+            # with a WHERE clause must reach every table through a SEARCH.
+            filtered = ' WHERE ' in ' '.join(statement.split())
+            bounded = ' LIMIT ' in statement and not any('TEMP B-TREE' in step for step in plan)
+            # A keyset page must come off an index already in cursor order; sorting every
+            # matching row on each page would undo the point of the cursor. Ranked search
+            # sorts by bm25 by design and is capped at search.RANKED matches.
+            ranked = any('VIRTUAL TABLE' in step for step in plan)
+            if ' LIMIT ' in statement and 'USE TEMP B-TREE FOR ORDER BY' in plan and not ranked:
+                self.fail(f'Sorted page for {url} in:\n{statement}\nplan: {plan}')
+            for step in plan:
+                match = re.match(r'SCAN (\w+)', step)
+                if not match or match.group(1) in ALLOWED_FULL_SCANS:
+                    continue
+                # A full-text MATCH is answered from the FTS5 index
+                if 'VIRTUAL TABLE INDEX' in step and ':M' in step:
+                    continue
+                if not filtered and ('INDEX' in step or bounded):
+                    continue
+                self.fail(f'Full scan ({step}) for {url} in:\n{statement}\nplan: {plan}')
+
+    def test_filtered_list_searches_index(self):
+        statements = self.capture('admin', ['/invoices?status=Pending'])
+        plans = [step for url, statement, parameters in statements for step in self.plan(statement, parameters)]
+        self.assertTrue(any(re.match(r'SEARCH invoice USING (COVERING )?INDEX ix_invoice_status_date_issued', step)
+                            for step in plans), plans)
+
+    def test_staff_routes(self):
+        self.assertNoFullScans(self.capture('admin', [
+            '/home',
+            '/dashboard',
+            '/api/dashboard/stats',
+            '/appointments',
+            '/appointments?status=Scheduled',
+            f'/appointments?doctor={self.doctor_id}',
+            '/appointments?date_from=2025-03-04&date_to=2025-03-05',
+            '/invoices',
+            '/invoices?status=Pending',
+            '/invoices?date_from=2025-03-01&date_to=2025-03-05',
+            '/invoices?status=Pending&date_from=2025-03-01',
+            '/patients',
+            '/patients?q=john',
+            '/patients?gender=Male',
+            '/patients?date_from=2025-03-01&date_to=2025-03-05',
+            '/patients?gender=Male&date_from=2025-03-01',
+            f'/patient/{self.patient_id}',
+            f'/invoice/{self.invoice_id}',
+            '/doctors',
+            '/api/slots?from=2025-03-03T08:00',
+            '/api/slots?specialization=Diagnostics&from=2025-03-03T08:00',
+            '/appointment/book',
+            '/invoice/new',
+            '/api/patients/search?q=jo',
+        ]))
+
+    def test_doctor_routes(self):
+        self.assertNoFullScans(self.capture('house', [
+            '/appointments',
+            '/doctor/profile',
+        ]))
+
+    def test_patient_routes(self):
+        self.assertNoFullScans(self.capture('john', [
+            '/appointments',
+            '/invoices',
+            '/invoices?date_from=2025-03-01',
+            '/appointment/book',
+        ]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+class ReplicaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.primary = os.path.join(self.folder, 'primary.db')
+        self.replica = os.path.join(self.folder, 'replica.db')
+        config = type('ReplicaConfig', (TestConfig,), dict(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + self.primary,
+            REPLICA_DATABASE_URI='sqlite:///' + self.replica))
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        db.session.add_all([admin, Patient(name='John Doe')])
+        db.session.commit()
+        self.replicate()
+
+        # Committed after the last "replication": only on the primary for now
+        db.session.add(Patient(name='Jane Roe'))
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.app.extensions['replica'].dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.folder)
+
+    def replicate(self):
+        self.app.extensions['replica'].dispose()
+        source, target = sqlite3.connect(self.primary), sqlite3.connect(self.replica)
+        source.backup(target)
+        source.close()
+        target.close()
+
+    def test_read_only_views_use_replica(self):
+        html = self.client.get('/patients').get_data(as_text=True)
+        self.assertIn('John Doe', html)
+        self.assertNotIn('Jane Roe', html)
+        # The dashboard figures are cached, so they are always computed on the primary
+        self.assertEqual(self.client.get('/api/dashboard/stats').get_json()['patients'], 2)
+
+        # Views that aren't marked read from the primary
+        patient_id = Patient.query.filter_by(name='Jane Roe').one().id
+        self.assertEqual(self.client.get(f'/patient/{patient_id}/update').status_code, 200)
+
+        self.replicate()
+        self.assertIn('Jane Roe', self.client.get('/patients').get_data(as_text=True))
+
+    def test_reads_after_write_stay_on_primary(self):
+        response = self.client.post('/invoice/new', data=dict(
+            patient=Patient.query.filter_by(name='Jane Roe').one().id,
+            description='Consultation', amount=50, status='Pending'))
+        self.assertEqual(response.status_code, 302)
+        # The invoice exists only on the primary, and so does Jane
+        self.assertIn('Jane Roe', self.client.get('/invoices').get_data(as_text=True))
+        self.assertIn('Jane Roe', self.client.get('/patients').get_data(as_text=True))
+
+        self.app.config['REPLICA_STICKY_SECONDS'] = 0
+        self.assertNotIn('Jane Roe', self.client.get('/patients').get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
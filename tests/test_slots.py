@@ -0,0 +1,102 @@
+import unittest
+import datetime
+from unittest import mock
+from app import create_app, db
+from app.config import Config
+from app.models import User, Patient, Doctor, Appointment
+from app.appointment import slots
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class SlotsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        admin = User(username='admin', email='admin@example.com', role='admin')
+        admin.set_password('password')
+        doc_user = User(username='house', email='house@example.com', role='doctor', password_hash=admin.password_hash)
+        self.doctor = Doctor(user=doc_user, specialization='Diagnostics')
+        self.patient = Patient(name='John Doe')
+        db.session.add_all([admin, doc_user, self.doctor, self.patient])
+        db.session.commit()
+        self.client.post('/login', data=dict(login_id='admin', password='password'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def book(self, when, url='/appointment/book'):
+        return self.client.post(url, data=dict(doctor=self.doctor.id, patient=self.patient.id,
+                                               date_time=when, reason='Checkup'))
+
+    def test_double_booking_rejected(self):
+        self.assertEqual(self.book('2025-03-03T09:30').status_code, 302)
+        response = self.book('2025-03-03T09:30')
+        self.assertIn(b'The doctor already has an appointment', response.data)
+        self.assertEqual(Appointment.query.count(), 1)
+
+        # The next slot is free, and so is a cancelled one
+        self.assertEqual(self.book('2025-03-03T10:00').status_code, 302)
+        Appointment.query.filter_by(date_time=datetime.datetime(2025, 3, 3, 9, 30)).one().status = 'Cancelled'
+        db.session.commit()
+        self.assertEqual(self.book('2025-03-03T09:30').status_code, 302)
+
+    def test_off_grid_times(self):
+        response = self.book('2025-03-03T09:10')
+        self.assertIn(b'Appointments start every 30 minutes', response.data)
+
+        # An older off-grid appointment still blocks the slots it overlaps
+        db.session.add(Appointment(doctor=self.doctor, patient=self.patient, reason='Legacy',
+                                   date_time=datetime.datetime(2025, 3, 3, 9, 10)))
+        db.session.commit()
+        self.assertIn(b'The doctor already has an appointment', self.book('2025-03-03T09:30').data)
+        self.assertIn(b'The doctor already has an appointment', self.book('2025-03-03T09:00').data)
+        self.assertEqual(self.book('2025-03-03T08:30').status_code, 302)
+
+    def test_update_keeps_own_slot(self):
+        self.book('2025-03-03T09:00')
+        self.book('2025-03-03T11:00')
+        first, second = Appointment.query.order_by(Appointment.id).all()
+        self.assertEqual(self.book('2025-03-03T09:00', f'/appointment/{first.id}/update').status_code, 302)
+        response = self.book('2025-03-03T09:00', f'/appointment/{second.id}/update')
+        self.assertIn(b'The doctor already has an appointment', response.data)
+        self.assertEqual(db.session.get(Appointment, second.id).date_time, datetime.datetime(2025, 3, 3, 11, 0))
+
+    def test_database_settles_races(self):
+        # Both requests passed the check before either committed
+        self.book('2025-03-03T09:00')
+        with mock.patch.object(slots, 'find_clash', return_value=None):
+            response = self.book('2025-03-03T09:00')
+        self.assertIn(b'That slot has just been booked', response.data)
+        self.assertEqual(Appointment.query.count(), 1)
+
+    def test_off_grid_appointment_can_be_edited(self):
+        legacy = Appointment(doctor=self.doctor, patient=self.patient, reason='Legacy',
+                             date_time=datetime.datetime(2025, 3, 3, 9, 10))
+        db.session.add(legacy)
+        db.session.commit()
+        url = f'/appointment/{legacy.id}/update'
+        self.assertEqual(self.book('2025-03-03T09:10', url).status_code, 302)
+        self.assertEqual(db.session.get(Appointment, legacy.id).reason, 'Checkup')
+        # Moving it still has to land on the grid
+        self.assertIn(b'Appointments start every 30 minutes', self.book('2025-03-03T09:20', url).data)
+
+    def test_race_detected_by_index_name(self):
+        class PostgresError(Exception):
+            diag = type('Diag', (), {'constraint_name': 'uq_appointment_doctor_slot'})()
+        self.assertTrue(slots._slot_index_failed(PostgresError(
+            'duplicate key value violates unique constraint "uq_appointment_doctor_slot"')))
+        self.assertTrue(slots._slot_index_failed(Exception(
+            'UNIQUE constraint failed: appointment.doctor_id, appointment.date_time')))
+        self.assertFalse(slots._slot_index_failed(Exception('NOT NULL constraint failed: appointment.reason')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,12 @@
+import unittest
+from benchmarks import startup
+
+class StartupTestCase(unittest.TestCase):
+    def test_no_heavy_imports(self):
+        # A fresh interpreter, so modules other tests imported don't count. The time
+        # budget is left to `python -m benchmarks.startup`; it depends on the machine.
+        ms, heavy, imports = startup.measure()
+        self.assertEqual(heavy, [], 'imported at startup; import them where they are used')
+
+if __name__ == '__main__':
+    unittest.main()
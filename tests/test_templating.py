@@ -0,0 +1,76 @@
+import unittest
+import os
+import shutil
+import tempfile
+from app import create_app, db, templating
+from app.config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+
+class TemplatingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+        class Configured(TestConfig):
+            TEMPLATE_CACHE_DIR = self.cache_dir
+        self.config = Configured
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def serving_app(self):
+        # As a gunicorn worker sets it up (post_worker_init in gunicorn.conf.py)
+        app = create_app(self.config)
+        app.testing = False
+        templating.warm_up(app)
+        return app
+
+    def test_templates_compiled_before_serving(self):
+        app = self.serving_app()
+        names = [n for n in app.jinja_env.list_templates() if n.endswith('.html')]
+        self.assertIn('base.html', names)
+        self.assertIn('patient/list.html', names)
+        # Loaded into memory and written out as bytecode before any request
+        self.assertEqual(len(app.jinja_env.cache), len(names))
+        self.assertEqual(len(os.listdir(self.cache_dir)), len(names))
+
+    def test_create_app_compiles_nothing(self):
+        # CLI commands and test apps load templates only when they render one
+        app = create_app(self.config)
+        self.assertEqual(len(app.jinja_env.cache), 0)
+        self.assertEqual(templating.warm_up(app), 0)
+
+    def test_compile_command(self):
+        app = create_app(self.config)
+        result = app.test_cli_runner().invoke(args=['templates', 'compile'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Compiled', result.output)
+        self.assertTrue(os.listdir(self.cache_dir))
+
+    def test_restart_reuses_bytecode(self):
+        self.serving_app()
+        mtimes = {name: os.stat(os.path.join(self.cache_dir, name)).st_mtime_ns
+                  for name in os.listdir(self.cache_dir)}
+
+        app = self.serving_app()
+        self.assertEqual({name: os.stat(os.path.join(self.cache_dir, name)).st_mtime_ns
+                          for name in os.listdir(self.cache_dir)}, mtimes)
+        with app.app_context():
+            db.create_all()
+            response = app.test_client().get('/login')
+            self.assertEqual(response.status_code, 200)
+            db.drop_all()
+
+    def test_precompile_can_be_disabled(self):
+        class Lazy(self.config):
+            PRECOMPILE_TEMPLATES = False
+        app = create_app(Lazy)
+        app.testing = False
+        self.assertEqual(templating.warm_up(app), 0)
+        self.assertEqual(len(app.jinja_env.cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()